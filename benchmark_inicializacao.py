@@ -0,0 +1,75 @@
+# Compara o tempo de inicialização e a memória (RSS) do bot no modo normal e no modo enxuto.
+#
+# Uso: DISCORD_TOKEN=... python benchmark_inicializacao.py [repetições]
+#
+# Cada medição roda o bot num processo separado, mede o tempo até o on_ready (que no modo
+# normal só dispara depois do chunking de membros) e o RSS nesse momento, e desconecta.
+import json
+import os
+import subprocess
+import sys
+import time
+
+def rss_mb():
+    # VmRSS do /proc no Linux; fora dele, o pico informado pelo resource
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+def medir():
+    inicio = time.perf_counter()
+    import bot as modulo_bot
+
+    @modulo_bot.bot.listen('on_ready')
+    async def pronto():
+        resultado = {
+            'segundos': time.perf_counter() - inicio,
+            'rss_mb': rss_mb(),
+            'servidores': len(modulo_bot.bot.guilds),
+            'membros_em_cache': sum(len(g.members) for g in modulo_bot.bot.guilds)
+        }
+        print('RESULTADO ' + json.dumps(resultado), flush=True)
+        await modulo_bot.bot.close()
+
+    modulo_bot.bot.run(os.environ['DISCORD_TOKEN'], log_handler=None)
+
+def rodar(modo_enxuto):
+    env = dict(os.environ, MODO_ENXUTO='1' if modo_enxuto else '0')
+    saida = subprocess.run(
+        [sys.executable, __file__, '--filho'],
+        env=env, capture_output=True, text=True, timeout=600
+    ).stdout
+    for linha in saida.splitlines():
+        if linha.startswith('RESULTADO '):
+            return json.loads(linha[len('RESULTADO '):])
+    raise RuntimeError(f"O bot não ficou pronto:\n{saida}")
+
+def main():
+    if not os.getenv('DISCORD_TOKEN'):
+        print("❌ Defina DISCORD_TOKEN para rodar o benchmark")
+        sys.exit(1)
+
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    for nome, enxuto in (('normal', False), ('enxuto', True)):
+        medicoes = [rodar(enxuto) for _ in range(repeticoes)]
+        segundos = sorted(m['segundos'] for m in medicoes)[len(medicoes) // 2]
+        rss = sorted(m['rss_mb'] for m in medicoes)[len(medicoes) // 2]
+        print(
+            f"{nome:>7}: on_ready em {segundos:.2f}s | RSS {rss:.1f} MB | "
+            f"{medicoes[0]['servidores']} servidores | {medicoes[0]['membros_em_cache']} membros em cache"
+        )
+
+if __name__ == '__main__':
+    if '--filho' in sys.argv:
+        medir()
+    else:
+        main()
@@ -1,62 +1,1145 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import Button, View, Select, Modal, TextInput
+import aiohttp
+import atexit
+import bisect
+import csv
+import gzip
+import heapq
+import io
+import itertools
 import json
 import os
-from datetime import datetime
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
 import asyncio
+from collections import OrderedDict
 
 # Configurações do bot
+# Modo enxuto (MODO_ENXUTO=1): sem intent de membros, sem chunking na inicialização e
+# sem cache de membros. Reduz memória e tempo de inicialização em servidores grandes
+MODO_ENXUTO = os.getenv('MODO_ENXUTO', '0') == '1'
+
 intents = discord.Intents.default()
 intents.message_content = True
-intents.members = True
+intents.members = not MODO_ENXUTO
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='.', intents=intents)
+# Shards: sem configuração, um processo abre quantos shards o Discord recomendar.
+# Para dividir entre processos, cada um recebe SHARD_COUNT (total) e SHARD_IDS
+# (os seus, ex.: "0-3" ou "4,5,6,7"); todos podem usar o mesmo DB_FILE
+def ler_shards(texto):
+    ids = []
+    for parte in texto.replace(' ', '').split(','):
+        if '-' in parte:
+            inicio, fim = parte.split('-')
+            ids.extend(range(int(inicio), int(fim) + 1))
+        elif parte:
+            ids.append(int(parte))
+    return sorted(set(ids)) or None
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0')) or None
+SHARD_IDS = ler_shards(os.getenv('SHARD_IDS', ''))
+
+if SHARD_IDS and not SHARD_COUNT:
+    raise RuntimeError('SHARD_IDS exige SHARD_COUNT')
+
+def shard_do_servidor(guild_id):
+    return (guild_id >> 22) % (SHARD_COUNT or bot.shard_count or 1)
+
+# Servidores de outros processos não são carregados nem varridos por este
+def servidor_deste_processo(guild_id):
+    return SHARD_IDS is None or shard_do_servidor(guild_id) in SHARD_IDS
+
+# Eventos recebidos por shard, com a taxa medida na última janela completa
+class MetricasShards:
+    JANELA = 60
+
+    def __init__(self):
+        self.totais = {}
+        self.janela = {}
+        self.taxas = {}
+        self.inicio_janela = time.monotonic()
+
+    def registrar(self, shard_id):
+        self.totais[shard_id] = self.totais.get(shard_id, 0) + 1
+        self.janela[shard_id] = self.janela.get(shard_id, 0) + 1
+        
+        agora = time.monotonic()
+        decorrido = agora - self.inicio_janela
+        if decorrido >= self.JANELA:
+            self.taxas = {shard: contagem / decorrido for shard, contagem in self.janela.items()}
+            self.janela = {}
+            self.inicio_janela = agora
+
+    def taxa(self, shard_id):
+        return self.taxas.get(shard_id, 0.0)
+
+metricas_shards = MetricasShards()
+
+# Shard de origem de um evento, pelo servidor do primeiro argumento (None se não houver)
+def shard_do_evento(args):
+    if not args:
+        return None
+    arg = args[0]
+    guild = arg if isinstance(arg, discord.Guild) else getattr(arg, 'guild', None)
+    if guild is not None:
+        return guild.shard_id
+    guild_id = getattr(arg, 'guild_id', None)
+    return shard_do_servidor(guild_id) if guild_id else None
+
+class BotVendas(commands.AutoShardedBot):
+    async def setup_hook(self):
+        fila_carrinhos.iniciar()
+        varredor_carrinhos.iniciar()
+        
+        # Comandos de barra: só um processo precisa sincronizar
+        if SHARD_IDS is None or 0 in SHARD_IDS:
+            try:
+                await self.tree.sync()
+            except discord.HTTPException as erro:
+                print(f"Erro ao sincronizar comandos de barra: {erro}")
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        metricas_shards.registrar(shard_do_evento(args))
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def close(self):
+        # Grava tudo que ainda está pendente antes de desconectar
+        await persistencia.descarregar()
+        await super().close()
+
+opcoes_bot = {}
+if MODO_ENXUTO:
+    opcoes_bot.update(
+        chunk_guilds_at_startup=False,
+        member_cache_flags=discord.MemberCacheFlags.none()
+    )
+if SHARD_COUNT:
+    opcoes_bot['shard_count'] = SHARD_COUNT
+if SHARD_IDS:
+    opcoes_bot['shard_ids'] = SHARD_IDS
+
+bot = BotVendas(command_prefix='.', intents=intents, **opcoes_bot)
 
 # Arquivo de configuração
 CONFIG_FILE = 'config.json'
 PRODUTOS_FILE = 'produtos.json'
 PRODUTOS_DROP_FILE = 'produtos_drop.json'
+DB_FILE = os.getenv('DB_FILE', 'vendas.db')
+
+CONFIG_PADRAO = {
+    'categorias_ids': [],
+    'pix_info': 'Configure seu PIX com o comando .ConfigPix'
+}
+
+# Objetos com para_dict() (ex.: Carrinho) são gravados como o dict correspondente
+def para_json(obj):
+    return obj.para_dict()
+
+# Preços são guardados em centavos (int). O texto digitado é lido uma vez, aceitando o
+# formato brasileiro ("29,90", "1.234,56", "R$ 30") e o com ponto decimal ("29.90")
+PRECO_BRL = re.compile(r'(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{1,2}))?')
+PRECO_PONTO = re.compile(r'(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d{1,2}))?')
+
+def ler_preco(texto):
+    limpo = str(texto).replace('R$', '').replace('\xa0', '').replace(' ', '')
+    for formato, milhar in ((PRECO_BRL, '.'), (PRECO_PONTO, ',')):
+        casamento = formato.fullmatch(limpo)
+        if casamento:
+            reais, centavos = casamento.groups()
+            valor = int(reais.replace(milhar, '')) * 100 + int((centavos or '0').ljust(2, '0'))
+            if valor <= 0:
+                raise ValueError(f"preço precisa ser maior que zero: {texto!r}")
+            return valor
+    raise ValueError(f"preço inválido: {texto!r}")
+
+def formatar_preco(centavos):
+    reais, resto = divmod(centavos, 100)
+    return f"{reais:,}".replace(',', '.') + f",{resto:02d}"
+
+# Item cujo preço antigo não pôde ser lido na migração (ou ficou zerado): fica fora de venda
+# até receber um preço válido
+def sem_preco_valido(item):
+    return 'preco_original' in item or item['preco'] <= 0
+
+# Armazenamento em SQLite (modo WAL), uma linha por produto/chave de configuração.
+# Configuração e catálogo são separados por servidor (guild_id); os dados anteriores
+# ao suporte a vários servidores ficam no servidor padrão (INQUILINO_PADRAO)
+INQUILINO_PADRAO = 0
+
+def sql_tabela_servidor(tabela):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {tabela} ('
+        f'guild_id INTEGER NOT NULL, id TEXT NOT NULL, dados TEXT NOT NULL, '
+        f'PRIMARY KEY (guild_id, id)) WITHOUT ROWID'
+    )
+
+class Armazenamento:
+    TABELAS_SERVIDOR = ('config', 'produtos', 'produtos_drop', 'paineis')
+
+    def __init__(self, caminho):
+        # Vários processos (um por faixa de shards) podem abrir o mesmo arquivo: quem encontrar
+        # o banco travado espera até 30s em vez de falhar na hora
+        self.caminho = caminho
+        self.conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.migrar_tabelas_servidor()
+        for tabela in self.TABELAS_SERVIDOR:
+            self.conn.execute(sql_tabela_servidor(tabela))
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS carrinhos (id TEXT PRIMARY KEY, dados TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rascunhos (id TEXT PRIMARY KEY, dados TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS sequencias (
+                nome TEXT NOT NULL, chave TEXT NOT NULL, teto INTEGER NOT NULL,
+                PRIMARY KEY (nome, chave)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS vendas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL,
+                carrinho_id TEXT NOT NULL UNIQUE, produto_id TEXT NOT NULL, comprador_id INTEGER NOT NULL,
+                preco INTEGER NOT NULL, criado_em TEXT NOT NULL, aprovado_em TEXT NOT NULL,
+                titulo TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TRIGGER IF NOT EXISTS vendas_sem_alteracao BEFORE UPDATE ON vendas
+                BEGIN SELECT RAISE(ABORT, 'o livro de vendas só aceita inserções'); END;
+            CREATE TRIGGER IF NOT EXISTS vendas_sem_remocao BEFORE DELETE ON vendas
+                BEGIN SELECT RAISE(ABORT, 'o livro de vendas só aceita inserções'); END;
+            CREATE TABLE IF NOT EXISTS vendas_resumo (
+                guild_id INTEGER NOT NULL, dimensao TEXT NOT NULL, chave TEXT NOT NULL,
+                quantidade INTEGER NOT NULL, total INTEGER NOT NULL, titulo TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (guild_id, dimensao, chave)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS vendas_por_data ON vendas (guild_id, aprovado_em);
+        ''')
+        self.lock = threading.Lock()
+        # Última versão serializada de cada linha, por (tabela, guild_id), para gravar só o que mudou
+        self.gravado = {}
+        self.migrar_json()
+        self.migrar_contador_carrinhos()
+        self.migrar_precos()
+        self.migrar_titulos_vendas()
+
+    def migrar_tabelas_servidor(self):
+        # Tabelas sem guild_id (versão com um único servidor): as linhas vão para o servidor padrão
+        for tabela in self.TABELAS_SERVIDOR:
+            colunas = [linha[1] for linha in self.conn.execute(f'PRAGMA table_info({tabela})')]
+            if not colunas or 'guild_id' in colunas:
+                continue
+            
+            self.conn.execute('BEGIN IMMEDIATE')
+            colunas = [linha[1] for linha in self.conn.execute(f'PRAGMA table_info({tabela})')]
+            if 'guild_id' in colunas:
+                # Outro processo migrou enquanto este esperava a trava
+                self.conn.execute('ROLLBACK')
+                continue
+            self.conn.execute(f'ALTER TABLE {tabela} RENAME TO {tabela}_antiga')
+            self.conn.execute(sql_tabela_servidor(tabela))
+            self.conn.execute(
+                f'INSERT INTO {tabela} (guild_id, id, dados) SELECT ?, id, dados FROM {tabela}_antiga',
+                (INQUILINO_PADRAO,)
+            )
+            self.conn.execute(f'DROP TABLE {tabela}_antiga')
+            self.conn.execute('COMMIT')
+
+    def migrar_json(self):
+        if self.conn.execute("SELECT 1 FROM meta WHERE chave = 'migracao_json'").fetchone():
+            return
+        
+        arquivos = {'config': CONFIG_FILE, 'produtos': PRODUTOS_FILE, 'produtos_drop': PRODUTOS_DROP_FILE}
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            if self.conn.execute("SELECT 1 FROM meta WHERE chave = 'migracao_json'").fetchone():
+                self.conn.execute('ROLLBACK')
+                return
+            for tabela, arquivo in arquivos.items():
+                if not os.path.exists(arquivo):
+                    continue
+                with open(arquivo, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                self.conn.executemany(
+                    f'INSERT OR REPLACE INTO {tabela} (guild_id, id, dados) VALUES (?, ?, ?)',
+                    [(INQUILINO_PADRAO, chave, json.dumps(valor, ensure_ascii=False)) for chave, valor in dados.items()]
+                )
+            self.conn.execute("INSERT INTO meta (chave, valor) VALUES ('migracao_json', ?)", (datetime.now().isoformat(),))
+            self.conn.execute('COMMIT')
+        
+        # Os JSON antigos ficam como backup, mas não são mais lidos
+        for arquivo in arquivos.values():
+            try:
+                os.replace(arquivo, f'{arquivo}.migrado')
+            except FileNotFoundError:
+                continue
+            print(f'📦 {arquivo} migrado para {DB_FILE}')
+
+    def migrar_contador_carrinhos(self):
+        # O antigo config['contador_carrinhos'] vira o ponto de partida da sequência de cada servidor
+        linha = self.conn.execute("SELECT dados FROM config WHERE id = 'contador_carrinhos'").fetchone()
+        if not linha:
+            return
+        
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sequencias (nome, chave, teto) VALUES ('carrinhos', ?, ?)",
+                list(json.loads(linha[0]).items())
+            )
+            self.conn.execute("DELETE FROM config WHERE id = 'contador_carrinhos'")
+            self.conn.execute('COMMIT')
+
+    def migrar_precos(self):
+        # Preços em texto (produtos, opções dos dropdowns, carrinhos e rascunhos) viram centavos.
+        # O que não der para ler fica com preço 0; no catálogo o texto original vai para
+        # 'preco_original' e o item sai de venda (sem_preco_valido) até ser corrigido. Nos
+        # carrinhos, que não têm campos extras, o texto vai só para o log
+        if self.conn.execute("SELECT 1 FROM meta WHERE chave = 'precos_centavos'").fetchone():
+            return
+        
+        def converter(item, descricao, guardar_original=True):
+            if isinstance(item.get('preco'), int):
+                return
+            try:
+                item['preco'] = ler_preco(item.get('preco', ''))
+            except ValueError:
+                if guardar_original:
+                    print(f"⚠️ Preço inválido em {descricao}: {item.get('preco')!r}; fora de venda até ser corrigido no .setup")
+                    item['preco_original'] = item.get('preco')
+                else:
+                    print(f"⚠️ Preço inválido em {descricao}: {item.get('preco')!r}; ficou R$ 0,00")
+                item['preco'] = 0
+        
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                if self.conn.execute("SELECT 1 FROM meta WHERE chave = 'precos_centavos'").fetchone():
+                    self.conn.execute('ROLLBACK')
+                    return
+                
+                for tabela in ('produtos', 'produtos_drop'):
+                    alteradas = []
+                    for guild_id, chave, dados in self.conn.execute(f'SELECT guild_id, id, dados FROM {tabela}').fetchall():
+                        item = json.loads(dados)
+                        if tabela == 'produtos':
+                            converter(item, chave)
+                        else:
+                            for opcao in item.get('opcoes', []):
+                                converter(opcao, f"{chave} ({opcao.get('nome')})")
+                        alteradas.append((json.dumps(item, ensure_ascii=False), guild_id, chave))
+                    self.conn.executemany(f'UPDATE {tabela} SET dados = ? WHERE guild_id = ? AND id = ?', alteradas)
+                
+                for tabela in ('carrinhos', 'rascunhos'):
+                    alteradas = []
+                    for chave, dados in self.conn.execute(f'SELECT id, dados FROM {tabela}').fetchall():
+                        item = json.loads(dados)
+                        if tabela == 'carrinhos':
+                            converter(item, f"carrinho {chave}", guardar_original=False)
+                        else:
+                            for opcao in item.get('opcoes', []):
+                                converter(opcao, f"rascunho {chave} ({opcao.get('nome')})")
+                        alteradas.append((json.dumps(item, ensure_ascii=False), chave))
+                    self.conn.executemany(f'UPDATE {tabela} SET dados = ? WHERE id = ?', alteradas)
+                
+                self.conn.execute("INSERT INTO meta (chave, valor) VALUES ('precos_centavos', ?)", (datetime.now().isoformat(),))
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+
+    def migrar_titulos_vendas(self):
+        # Livros de vendas anteriores ao título do item: as vendas antigas ficam com título vazio
+        # e os relatórios usam o nome atual do catálogo para elas
+        if 'titulo' in [linha[1] for linha in self.conn.execute('PRAGMA table_info(vendas)')]:
+            return
+        
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            if 'titulo' in [linha[1] for linha in self.conn.execute('PRAGMA table_info(vendas)')]:
+                self.conn.execute('ROLLBACK')
+                return
+            for tabela in ('vendas', 'vendas_resumo'):
+                self.conn.execute(f"ALTER TABLE {tabela} ADD COLUMN titulo TEXT NOT NULL DEFAULT ''")
+            self.conn.execute('COMMIT')
+
+    def reivindicar_padrao(self, guild_id):
+        # Passa os dados do servidor padrão para guild_id, se ele ainda não tiver catálogo próprio.
+        # A configuração que o servidor já tiver prevalece sobre a do padrão
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                padrao = any(
+                    self.conn.execute(f'SELECT 1 FROM {tabela} WHERE guild_id = ? LIMIT 1', (INQUILINO_PADRAO,)).fetchone()
+                    for tabela in self.TABELAS_SERVIDOR
+                )
+                ocupado = any(
+                    self.conn.execute(f'SELECT 1 FROM {tabela} WHERE guild_id = ? LIMIT 1', (guild_id,)).fetchone()
+                    for tabela in ('produtos', 'produtos_drop')
+                )
+                if padrao and not ocupado:
+                    for tabela in self.TABELAS_SERVIDOR:
+                        self.conn.execute(
+                            f'UPDATE OR IGNORE {tabela} SET guild_id = ? WHERE guild_id = ?',
+                            (guild_id, INQUILINO_PADRAO)
+                        )
+                        self.conn.execute(f'DELETE FROM {tabela} WHERE guild_id = ?', (INQUILINO_PADRAO,))
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+        return padrao and not ocupado
+
+    def reservar_bloco(self, nome, chave, tamanho, piso=0):
+        # BEGIN IMMEDIATE trava a escrita, então dois processos nunca recebem o mesmo bloco
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                linha = self.conn.execute(
+                    'SELECT teto FROM sequencias WHERE nome = ? AND chave = ?', (nome, chave)
+                ).fetchone()
+                inicio = max(linha[0] if linha else 0, piso)
+                self.conn.execute(
+                    'INSERT INTO sequencias (nome, chave, teto) VALUES (?, ?, ?) '
+                    'ON CONFLICT(nome, chave) DO UPDATE SET teto = excluded.teto',
+                    (nome, chave, inicio + tamanho)
+                )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+        return inicio, inicio + tamanho
+
+    def registrar_venda(self, venda):
+        # O livro de vendas só recebe inserções. Os resumos por dia, produto e comprador são
+        # somados na mesma transação; aprovar de novo o mesmo carrinho não conta duas vezes.
+        # Venda e resumo do produto guardam o título do item na compra, que não muda depois
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                inserida = self.conn.execute(
+                    'INSERT OR IGNORE INTO vendas '
+                    '(guild_id, carrinho_id, produto_id, comprador_id, preco, criado_em, aprovado_em, titulo) '
+                    'VALUES (:guild_id, :carrinho_id, :produto_id, :comprador_id, :preco, :criado_em, :aprovado_em, :titulo)',
+                    venda
+                ).rowcount == 1
+                if inserida:
+                    self.conn.executemany(
+                        'INSERT INTO vendas_resumo (guild_id, dimensao, chave, quantidade, total, titulo) VALUES (?, ?, ?, 1, ?, ?) '
+                        'ON CONFLICT(guild_id, dimensao, chave) DO UPDATE SET '
+                        'quantidade = quantidade + 1, total = total + excluded.total, titulo = excluded.titulo',
+                        [
+                            (venda['guild_id'], dimensao, chave, venda['preco'], titulo)
+                            for dimensao, chave, titulo in (
+                                ('dia', venda['aprovado_em'][:10], ''),
+                                ('produto', venda['produto_id'], venda['titulo']),
+                                ('comprador', str(venda['comprador_id']), '')
+                            )
+                        ]
+                    )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+        return inserida
+
+    def vendas_por_dia(self, guild_id, inicio, fim):
+        # Um resumo por dia do intervalo (datas AAAA-MM-DD), sem ler o livro de vendas
+        return self.conn.execute(
+            "SELECT chave, quantidade, total FROM vendas_resumo "
+            "WHERE guild_id = ? AND dimensao = 'dia' AND chave BETWEEN ? AND ? ORDER BY chave",
+            (guild_id, inicio, fim)
+        ).fetchall()
+
+    def maiores_vendas(self, guild_id, dimensao, limite):
+        return self.conn.execute(
+            'SELECT chave, quantidade, total, titulo FROM vendas_resumo '
+            'WHERE guild_id = ? AND dimensao = ? ORDER BY total DESC, quantidade DESC LIMIT ?',
+            (guild_id, dimensao, limite)
+        ).fetchall()
+
+    def ler_vendas(self, guild_id, inicio, fim, lote=500):
+        # Conexão própria para exportar: com o WAL ela lê uma foto consistente do livro sem
+        # segurar as gravações do bot, e as linhas vêm em lotes em vez de todas de uma vez
+        conn = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            cursor = conn.execute(
+                'SELECT id, aprovado_em, criado_em, carrinho_id, produto_id, comprador_id, preco, titulo FROM vendas '
+                'WHERE guild_id = ? AND aprovado_em >= ? AND aprovado_em < ? ORDER BY aprovado_em, id',
+                (guild_id, inicio, fim)
+            )
+            while True:
+                linhas = cursor.fetchmany(lote)
+                if not linhas:
+                    return
+                yield from linhas
+        finally:
+            conn.close()
+
+    def carregar(self, tabela, guild_id=None):
+        if guild_id is None:
+            linhas = self.conn.execute(f'SELECT id, dados FROM {tabela}').fetchall()
+        else:
+            linhas = self.conn.execute(f'SELECT id, dados FROM {tabela} WHERE guild_id = ?', (guild_id,)).fetchall()
+        self.gravado[(tabela, guild_id)] = dict(linhas)
+        return {chave: json.loads(dados) for chave, dados in linhas}
+
+    def obter(self, tabela, chave, guild_id=None):
+        if guild_id is None:
+            linha = self.conn.execute(f'SELECT dados FROM {tabela} WHERE id = ?', (chave,)).fetchone()
+        else:
+            linha = self.conn.execute(
+                f'SELECT dados FROM {tabela} WHERE guild_id = ? AND id = ?', (guild_id, chave)
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def esquecer(self, guild_id):
+        for chave in [chave for chave in self.gravado if chave[1] == guild_id]:
+            del self.gravado[chave]
+
+    def preparar(self, tabela, dados, chaves=None, guild_id=None):
+        gravado = self.gravado.setdefault((tabela, guild_id), {})
+        
+        # Sem chaves: compara com o que já foi gravado e grava só as linhas alteradas
+        if not chaves:
+            chaves = set(dados) | set(gravado)
+        
+        upserts = []
+        remocoes = []
+        for chave in chaves:
+            if chave in dados:
+                serializado = json.dumps(dados[chave], ensure_ascii=False, default=para_json)
+                if gravado.get(chave) != serializado:
+                    upserts.append((chave, serializado))
+                    gravado[chave] = serializado
+            elif chave in gravado:
+                remocoes.append((chave,))
+                del gravado[chave]
+        
+        return upserts, remocoes
+
+    def gravar(self, lote):
+        # Um lote = {(tabela, guild_id): (dados, upserts, remocoes)}, gravado numa única transação
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                for (tabela, guild_id), (_, upserts, remocoes) in lote.items():
+                    if guild_id is None:
+                        self.conn.executemany(
+                            f'INSERT INTO {tabela} (id, dados) VALUES (?, ?) '
+                            f'ON CONFLICT(id) DO UPDATE SET dados = excluded.dados',
+                            upserts
+                        )
+                        self.conn.executemany(f'DELETE FROM {tabela} WHERE id = ?', remocoes)
+                    else:
+                        self.conn.executemany(
+                            f'INSERT INTO {tabela} (guild_id, id, dados) VALUES (?, ?, ?) '
+                            f'ON CONFLICT(guild_id, id) DO UPDATE SET dados = excluded.dados',
+                            [(guild_id, chave, serializado) for chave, serializado in upserts]
+                        )
+                        self.conn.executemany(
+                            f'DELETE FROM {tabela} WHERE guild_id = ? AND id = ?',
+                            [(guild_id, chave) for (chave,) in remocoes]
+                        )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+
+armazenamento = Armazenamento(DB_FILE)
+
+# Gravação assíncrona (write-behind): as alterações são acumuladas por tabela e servidor
+# e gravadas em lote numa thread, sem bloquear o event loop
+ATRASO_NOVA_TENTATIVA = float(os.getenv('ATRASO_NOVA_TENTATIVA', '5'))
+
+class Persistencia:
+    def __init__(self, armazenamento, atraso=0.5):
+        self.armazenamento = armazenamento
+        self.atraso = atraso
+        # (tabela, guild_id) -> [dados, chaves alteradas ou None para a tabela inteira]
+        self.pendentes = {}
+        self.em_voo = set()
+        self.tarefa = None
+        self.lock = None
+
+    def marcar(self, tabela, dados, chaves):
+        pendente = self.pendentes.setdefault((tabela, getattr(dados, 'guild_id', None)), [dados, set()])
+        pendente[0] = dados
+        if not chaves:
+            pendente[1] = None
+        elif pendente[1] is not None:
+            pendente[1].update(chaves)
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.descarregar_sync()
+            return
+        
+        if self.tarefa is None or self.tarefa.done():
+            self.tarefa = loop.create_task(self._descarregar_depois())
+
+    # Servidor com alterações ainda não gravadas (não pode sair do cache de inquilinos)
+    def pendente(self, guild_id):
+        return guild_id in self.em_voo or any(chave[1] == guild_id for chave in self.pendentes)
+
+    def _coletar(self):
+        lote = {}
+        pendentes, self.pendentes = self.pendentes, {}
+        for (tabela, guild_id), (dados, chaves) in pendentes.items():
+            upserts, remocoes = self.armazenamento.preparar(tabela, dados, chaves, guild_id)
+            if upserts or remocoes:
+                lote[(tabela, guild_id)] = (dados, upserts, remocoes)
+        return lote
+
+    def _falhou(self, lote, erro):
+        # O estado dessas linhas no banco fica desconhecido (None): a próxima tentativa regrava
+        # o que ainda existir e apaga o que foi removido, mesmo que a remoção tenha falhado
+        print(f"Erro ao gravar dados: {erro}")
+        for chave_fonte, (dados, upserts, remocoes) in lote.items():
+            chaves = [chave for chave, _ in upserts] + [chave for (chave,) in remocoes]
+            gravado = self.armazenamento.gravado.setdefault(chave_fonte, {})
+            for chave in chaves:
+                gravado[chave] = None
+            pendente = self.pendentes.setdefault(chave_fonte, [dados, set()])
+            if pendente[1] is not None:
+                pendente[1].update(chaves)
+
+    async def _descarregar_depois(self, atraso=None):
+        await asyncio.sleep(self.atraso if atraso is None else atraso)
+        await self.descarregar()
+
+    async def descarregar(self):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        
+        # Devolve False se a gravação falhar (as linhas continuam pendentes e há nova tentativa)
+        async with self.lock:
+            lote = self._coletar()
+            if not lote:
+                return True
+            self.em_voo = {guild_id for _, guild_id in lote}
+            try:
+                await asyncio.to_thread(self.armazenamento.gravar, lote)
+            except Exception as erro:
+                self._falhou(lote, erro)
+                # Nova tentativa agendada, sem esperar outra alteração
+                self.tarefa = asyncio.get_running_loop().create_task(self._descarregar_depois(ATRASO_NOVA_TENTATIVA))
+                return False
+            else:
+                # O que foi marcado durante a gravação não agendou tarefa (esta ainda rodava)
+                if self.pendentes:
+                    self.tarefa = asyncio.get_running_loop().create_task(self._descarregar_depois())
+                return True
+            finally:
+                self.em_voo = set()
+
+    def descarregar_sync(self):
+        lote = self._coletar()
+        if lote:
+            try:
+                self.armazenamento.gravar(lote)
+            except Exception as erro:
+                self._falhou(lote, erro)
+
+persistencia = Persistencia(armazenamento)
+# Garantia extra caso o processo termine sem passar pelo bot.close()
+atexit.register(persistencia.descarregar_sync)
+
+# Sequências numéricas por servidor (ex.: número do carrinho). Os números são
+# reservados no banco em blocos; dentro do bloco cada alocação é só um incremento em memória
+class AlocadorSequencia:
+    def __init__(self, armazenamento, nome, bloco=50):
+        self.armazenamento = armazenamento
+        self.nome = nome
+        self.bloco = bloco
+        self.proximos = {}
+        self.tetos = {}
+        self.locks = {}
+
+    # piso: função com o menor número aceitável, consultada só no primeiro bloco do processo
+    # (ex.: para não repetir ids que já existiam antes da sequência)
+    async def proximo(self, chave, piso=None):
+        chave = str(chave)
+        lock = self.locks.setdefault(chave, asyncio.Lock())
+        
+        async with lock:
+            numero = self.proximos.get(chave)
+            if numero is None or numero >= self.tetos[chave]:
+                minimo = piso() if piso and numero is None else 0
+                numero, teto = await asyncio.to_thread(
+                    self.armazenamento.reservar_bloco, self.nome, chave, self.bloco, minimo
+                )
+                self.tetos[chave] = teto
+            
+            self.proximos[chave] = numero + 1
+            return numero
+
+numeros_carrinho = AlocadorSequencia(armazenamento, 'carrinhos')
+ids_produtos = AlocadorSequencia(armazenamento, 'produtos')
+ids_produtos_drop = AlocadorSequencia(armazenamento, 'produtos_drop')
+
+# Ids de produtos e painéis: "prod_<n>" / "drop_<n>" com n crescente por servidor, vindo da
+# sequência no banco. A numeração continua depois do maior id que já existia no catálogo
+def proximo_livre(dados, prefixo):
+    return max(
+        (int(chave[len(prefixo):]) for chave in dados if chave.startswith(prefixo) and chave[len(prefixo):].isdigit()),
+        default=0
+    ) + 1
+
+async def novo_id_produto(inquilino):
+    numero = await ids_produtos.proximo(inquilino.guild_id, lambda: proximo_livre(inquilino.produtos, 'prod_'))
+    return f"prod_{numero}"
+
+async def novo_id_drop(inquilino):
+    numero = await ids_produtos_drop.proximo(inquilino.guild_id, lambda: proximo_livre(inquilino.produtos_drop, 'drop_'))
+    return f"drop_{numero}"
+
+# Estado de um carrinho aberto
+class Carrinho:
+    __slots__ = (
+        'id', 'guild_id', 'canal_id', 'comprador_id', 'produto_id',
+        'preco', 'status', 'criado_em', 'atualizado_em', 'avisado', 'titulo'
+    )
+
+    def __init__(self, id, guild_id, canal_id, comprador_id, produto_id, preco,
+                 status='aberto', criado_em=None, atualizado_em=None, avisado=False, titulo=None):
+        self.id = id
+        self.guild_id = guild_id
+        self.canal_id = canal_id
+        self.comprador_id = comprador_id
+        self.produto_id = produto_id
+        self.preco = preco
+        self.status = status
+        self.criado_em = criado_em or datetime.now().isoformat()
+        self.atualizado_em = atualizado_em or self.criado_em
+        self.avisado = avisado
+        # Título do item no momento da compra, para o livro de vendas (carrinhos antigos: None)
+        self.titulo = titulo
+
+    def ultima_atividade(self):
+        return datetime.fromisoformat(self.atualizado_em).timestamp()
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+# Carrinhos abertos, indexados por id e por canal. Fechar um carrinho remove a linha do banco
+class Carrinhos:
+    def __init__(self):
+        self.por_id = {}
+        self.canais = {}
+
+    def carregar(self):
+        # Só os carrinhos dos shards deste processo; os demais são de outro processo
+        for dados in armazenamento.carregar('carrinhos').values():
+            # Só os campos conhecidos: uma chave a mais na linha não impede o bot de subir
+            carrinho = Carrinho(**{campo: dados[campo] for campo in Carrinho.__slots__ if campo in dados})
+            if not servidor_deste_processo(carrinho.guild_id):
+                continue
+            self.por_id[carrinho.id] = carrinho
+            self.canais[carrinho.canal_id] = carrinho
+
+    def por_canal(self, canal_id):
+        return self.canais.get(canal_id)
+
+    def adicionar(self, carrinho):
+        self.por_id[carrinho.id] = carrinho
+        self.canais[carrinho.canal_id] = carrinho
+        persistencia.marcar('carrinhos', self.por_id, [carrinho.id])
+        varredor_carrinhos.agendar(carrinho)
+
+    def atualizar(self, carrinho, **campos):
+        for campo, valor in campos.items():
+            setattr(carrinho, campo, valor)
+        persistencia.marcar('carrinhos', self.por_id, [carrinho.id])
+
+    # Registra atividade no carrinho e adia a expiração
+    def tocar(self, carrinho):
+        self.atualizar(carrinho, atualizado_em=datetime.now().isoformat(), avisado=False)
+        varredor_carrinhos.agendar(carrinho)
+
+    def remover(self, canal_id):
+        carrinho = self.canais.pop(canal_id, None)
+        if carrinho:
+            self.por_id.pop(carrinho.id, None)
+            persistencia.marcar('carrinhos', self.por_id, [carrinho.id])
+            varredor_carrinhos.cancelar(carrinho.id)
+        return carrinho
+
+# Dicionários de dados de um servidor: sabem a qual guild pertencem, então os save_*
+# continuam recebendo o próprio dicionário
+class DadosServidor(dict):
+    def __init__(self, guild_id, dados=()):
+        super().__init__(dados)
+        self.guild_id = guild_id
+        # Índice (título, id) ordenado, usado pelos seletores; refeito após cada gravação
+        self.indice = None
+        # Índice de busca por prefixo de palavra (/produto), atualizado item a item. Enquanto
+        # é montado em segundo plano, busca_alteradas guarda os itens gravados nesse meio tempo
+        self.busca = None
+        self.construcao_busca = None
+        self.busca_alteradas = set()
+        # Campo (nome, valor) de cada item na listagem, refeito só para os itens gravados
+        self.campos = {}
+        # Versão de cada item para o cache de embeds; itens nunca gravados usam a geração
+        # do carregamento, então um servidor recarregado nunca reaproveita embed antigo
+        self.geracao = next(versoes_catalogo)
+        self.versoes = {}
+
+versoes_catalogo = itertools.count(1)
+
+def versao_item(dados, chave):
+    return dados.versoes.get(chave, dados.geracao)
+
+def indice_titulos(dados, campo):
+    if dados.indice is None:
+        dados.indice = sorted((item[campo].casefold(), chave) for chave, item in dados.items())
+    return dados.indice
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+def palavras_busca(textos):
+    return set(re.findall(r'\w+', normalizar(' '.join(textos))))
+
+# Índice invertido palavra -> itens, com o vocabulário ordenado para achar por bisect todas
+# as palavras que começam com o que foi digitado. Cada palavra da busca precisa ser prefixo
+# de alguma palavra do item; o custo depende das palavras que casam, não do tamanho do catálogo
+class IndiceBusca:
+    def __init__(self):
+        self.itens = {}
+        self.palavras = {}
+        self.vocabulario = []
+
+    @classmethod
+    def construir(cls, entradas):
+        # Índice inteiro de uma vez (entradas = [(chave, titulo, textos)]): o vocabulário é
+        # ordenado uma única vez no fim, em vez de um insort por palavra
+        indice = cls()
+        for chave, titulo, textos in entradas:
+            palavras = palavras_busca(textos)
+            indice.itens[chave] = (normalizar(titulo), palavras)
+            for palavra in palavras:
+                indice.palavras.setdefault(palavra, set()).add(chave)
+        indice.vocabulario = sorted(indice.palavras)
+        return indice
+
+    def atualizar(self, chave, titulo, textos):
+        self.remover(chave)
+        palavras = palavras_busca(textos)
+        self.itens[chave] = (normalizar(titulo), palavras)
+        for palavra in palavras:
+            if palavra not in self.palavras:
+                self.palavras[palavra] = set()
+                bisect.insort(self.vocabulario, palavra)
+            self.palavras[palavra].add(chave)
+
+    def remover(self, chave):
+        item = self.itens.pop(chave, None)
+        if item is None:
+            return
+        for palavra in item[1]:
+            chaves = self.palavras[palavra]
+            chaves.discard(chave)
+            if not chaves:
+                del self.palavras[palavra]
+                del self.vocabulario[bisect.bisect_left(self.vocabulario, palavra)]
+
+    def com_prefixo(self, prefixo):
+        inicio = bisect.bisect_left(self.vocabulario, prefixo)
+        fim = bisect.bisect_left(self.vocabulario, prefixo + '\uffff')
+        return self.vocabulario[inicio:fim]
+
+    def buscar(self, termo, limite):
+        termo = normalizar(termo)
+        tokens = re.findall(r'\w+', termo)
+        if not tokens:
+            return heapq.nsmallest(limite, (((False, False, titulo), chave) for chave, (titulo, _) in self.itens.items()))
+        
+        # Reúne os candidatos pela palavra que casa com menos itens e confere as demais em cada um
+        faixas = sorted(
+            ((sum(len(self.palavras[p]) for p in self.com_prefixo(token)), token) for token in set(tokens))
+        )
+        _, primeiro = faixas[0]
+        restantes = [token for _, token in faixas[1:]]
+        candidatos = set()
+        for palavra in self.com_prefixo(primeiro):
+            candidatos |= self.palavras[palavra]
+        
+        resultados = []
+        for chave in candidatos:
+            titulo, palavras = self.itens[chave]
+            if all(any(p.startswith(token) for p in palavras) for token in restantes):
+                # Títulos que começam com a busca vêm primeiro, depois os que a contêm
+                resultados.append(((not titulo.startswith(termo), termo not in titulo, titulo), chave))
+        
+        # (ordem, chave), já na ordem de relevância
+        return heapq.nsmallest(limite, resultados)
+
+def textos_produto(produto):
+    return produto['titulo'], (produto['titulo'], produto.get('descricao', ''))
+
+def textos_drop(painel):
+    return painel['titulo_painel'], (
+        painel['titulo_painel'], painel.get('descricao_painel', ''), *(op['nome'] for op in painel['opcoes'])
+    )
+
+# Catálogos pequenos têm o índice montado na hora. Nos maiores ele é montado numa thread a
+# partir de uma cópia dos textos, sem travar o event loop; até ficar pronto, indice_busca
+# devolve None e a busca nesse catálogo não traz resultados
+LIMITE_BUSCA_SINCRONA = int(os.getenv('LIMITE_BUSCA_SINCRONA', '1000'))
+
+def entradas_busca(dados, textos):
+    return [(chave, *textos(item)) for chave, item in dados.items()]
+
+def indice_busca(dados, textos):
+    if dados.busca is None and dados.construcao_busca is None:
+        if len(dados) <= LIMITE_BUSCA_SINCRONA:
+            dados.busca = IndiceBusca.construir(entradas_busca(dados, textos))
+        else:
+            dados.busca_alteradas = set()
+            dados.construcao_busca = asyncio.get_running_loop().create_task(construir_busca(dados, textos))
+    return dados.busca
+
+async def construir_busca(dados, textos):
+    try:
+        busca = await asyncio.to_thread(IndiceBusca.construir, entradas_busca(dados, textos))
+    except Exception as erro:
+        print(f"Erro ao montar o índice de busca: {erro}")
+        busca = None
+    finally:
+        dados.construcao_busca = None
+    
+    # Itens gravados durante a montagem são reaplicados; se o catálogo inteiro foi regravado
+    # (alteradas = None), o índice é descartado e a próxima busca monta outro
+    alteradas, dados.busca_alteradas = dados.busca_alteradas, set()
+    if busca is None or alteradas is None:
+        return
+    dados.busca = busca
+    if alteradas:
+        atualizar_busca(dados, alteradas, textos)
+
+# Atualiza só os itens gravados; uma gravação sem chaves descarta o índice inteiro
+def atualizar_busca(dados, chaves, textos):
+    if dados.construcao_busca is not None:
+        if dados.busca_alteradas is not None:
+            dados.busca_alteradas = dados.busca_alteradas | set(chaves) if chaves else None
+        return
+    if dados.busca is None:
+        return
+    if not chaves:
+        dados.busca = None
+        return
+    for chave in chaves:
+        if chave in dados:
+            dados.busca.atualizar(chave, *textos(dados[chave]))
+        else:
+            dados.busca.remover(chave)
+
+# Invalida tudo que é derivado dos itens gravados do catálogo
+def catalogo_alterado(dados, chaves, textos):
+    dados.indice = None
+    atualizar_busca(dados, chaves, textos)
+    if not chaves:
+        dados.campos.clear()
+        dados.geracao = next(versoes_catalogo)
+        dados.versoes.clear()
+    for chave in chaves:
+        dados.campos.pop(chave, None)
+        dados.versoes[chave] = next(versoes_catalogo)
 
 # Carregar ou criar configuração
-def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {
-        'categoria_id': None,
-        'pix_info': 'Configure seu PIX com o comando .ConfigPix',
-        'contador_carrinhos': {}
-    }
+def load_config(guild_id):
+    config = DadosServidor(guild_id, CONFIG_PADRAO)
+    config['categorias_ids'] = []
+    config.update(armazenamento.carregar('config', guild_id))
+    
+    # Antes havia uma única categoria ('categoria_id'); agora é uma lista ordenada
+    if 'categoria_id' in config:
+        categoria_id = config.pop('categoria_id')
+        if categoria_id and not config['categorias_ids']:
+            config['categorias_ids'] = [categoria_id]
+        save_config(config, 'categoria_id', 'categorias_ids')
+    
+    return config
+
+def save_config(config, *chaves):
+    persistencia.marcar('config', config, chaves)
+
+def load_produtos(guild_id):
+    return DadosServidor(guild_id, armazenamento.carregar('produtos', guild_id))
+
+def save_produtos(produtos, *produto_ids):
+    catalogo_alterado(produtos, produto_ids, textos_produto)
+    persistencia.marcar('produtos', produtos, produto_ids)
+    atualizador_paineis.agendar(produtos.guild_id, 'p', produto_ids or list(produtos))
+
+# Cada opção de um painel dropdown tem um id próprio, que não muda se as opções forem
+# reordenadas ou renomeadas: é ele que identifica a opção nos carrinhos e no livro de vendas
+def id_opcao():
+    return secrets.token_hex(4)
+
+def garantir_ids_opcoes(opcoes, anteriores=()):
+    # Opções sem id (ou com id repetido) reaproveitam o id da opção anterior de mesmo nome
+    por_nome = {opcao['nome']: opcao['id'] for opcao in anteriores if opcao.get('id')}
+    usados = set()
+    alterou = False
+    for opcao in opcoes:
+        if not opcao.get('id') or opcao['id'] in usados:
+            reaproveitado = por_nome.get(opcao['nome'])
+            opcao['id'] = reaproveitado if reaproveitado and reaproveitado not in usados else id_opcao()
+            alterou = True
+        usados.add(opcao['id'])
+    return alterou
 
-def save_config(config):
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+def load_produtos_drop(guild_id):
+    produtos_drop = DadosServidor(guild_id, armazenamento.carregar('produtos_drop', guild_id))
+    
+    # Painéis anteriores aos ids de opção ganham ids uma única vez
+    sem_id = [drop_id for drop_id, painel in produtos_drop.items() if garantir_ids_opcoes(painel['opcoes'])]
+    if sem_id:
+        persistencia.marcar('produtos_drop', produtos_drop, sem_id)
+    
+    return produtos_drop
+
+def save_produtos_drop(produtos_drop, *drop_ids):
+    catalogo_alterado(produtos_drop, drop_ids, textos_drop)
+    persistencia.marcar('produtos_drop', produtos_drop, drop_ids)
+    atualizador_paineis.agendar(produtos_drop.guild_id, 'd', drop_ids or list(produtos_drop))
+
+# Painéis enviados: id da mensagem -> {'tipo': 'p' ou 'd', 'item': id do produto/painel, 'canal': id}
+def load_paineis(guild_id):
+    return DadosServidor(guild_id, armazenamento.carregar('paineis', guild_id))
+
+def save_paineis(paineis, *mensagem_ids):
+    persistencia.marcar('paineis', paineis, mensagem_ids)
+
+# Dados de cada servidor (inquilino), carregados na primeira vez que o servidor usa o bot.
+# Só os MAX_INQUILINOS usados mais recentemente ficam em memória; servidores com
+# gravações pendentes nunca são descartados
+MAX_INQUILINOS = int(os.getenv('MAX_INQUILINOS', '100'))
+
+class Inquilino:
+    __slots__ = ('guild_id', 'config', 'produtos', 'produtos_drop', 'paineis')
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.config = load_config(guild_id)
+        self.produtos = load_produtos(guild_id)
+        self.produtos_drop = load_produtos_drop(guild_id)
+        self.paineis = load_paineis(guild_id)
+
+class Inquilinos:
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self.cache = OrderedDict()
+
+    def obter(self, guild_id):
+        inquilino = self.cache.get(guild_id)
+        if inquilino is None:
+            inquilino = Inquilino(guild_id)
+            self.cache[guild_id] = inquilino
+            self._despejar()
+        else:
+            self.cache.move_to_end(guild_id)
+        return inquilino
+
+    def descartar(self, guild_id):
+        self.cache.pop(guild_id, None)
+        armazenamento.esquecer(guild_id)
+
+    def _despejar(self):
+        excedente = len(self.cache) - self.maximo
+        for guild_id in list(self.cache):
+            if excedente <= 0:
+                break
+            if persistencia.pendente(guild_id):
+                continue
+            self.descartar(guild_id)
+            excedente -= 1
+
+inquilinos = Inquilinos(MAX_INQUILINOS)
+
+carrinhos = Carrinhos()
+carrinhos.carregar()
+
+# Rascunhos do assistente de painel dropdown, um por admin em cada servidor ("<guild>-<user>").
+# Cada uso renova o prazo; os mais antigos ficam no início do OrderedDict, então expirar ou
+# respeitar MAX_RASCUNHOS é só retirar do início. Com PERSISTIR_RASCUNHOS=1 (padrão) os
+# rascunhos vão para o banco e sobrevivem a reinícios
+MAX_RASCUNHOS = int(os.getenv('MAX_RASCUNHOS', '200'))
+TTL_RASCUNHO_MINUTOS = int(os.getenv('TTL_RASCUNHO_MINUTOS', '60'))
+PERSISTIR_RASCUNHOS = os.getenv('PERSISTIR_RASCUNHOS', '1') == '1'
 
-def load_produtos():
-    if os.path.exists(PRODUTOS_FILE):
-        with open(PRODUTOS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+class Rascunhos:
+    def __init__(self, maximo, ttl, persistir):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.persistir = persistir
+        self.itens = OrderedDict()
 
-def save_produtos(produtos):
-    with open(PRODUTOS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(produtos, f, indent=4, ensure_ascii=False)
+    @staticmethod
+    def chave(guild_id, user_id):
+        return f"{guild_id}-{user_id}"
 
-def load_produtos_drop():
-    if os.path.exists(PRODUTOS_DROP_FILE):
-        with open(PRODUTOS_DROP_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    def carregar(self):
+        if not self.persistir:
+            return
+        
+        salvos = armazenamento.carregar('rascunhos')
+        for chave, rascunho in sorted(salvos.items(), key=lambda item: item[1]['expira']):
+            if servidor_deste_processo(int(chave.split('-')[0])):
+                self.itens[chave] = rascunho
+        self._expirar()
+
+    def _gravar(self, chave):
+        if self.persistir:
+            persistencia.marcar('rascunhos', self.itens, [chave])
+
+    def _expirar(self):
+        agora = time.time()
+        while self.itens:
+            chave, rascunho = next(iter(self.itens.items()))
+            if rascunho['expira'] > agora and len(self.itens) <= self.maximo:
+                break
+            del self.itens[chave]
+            self._gravar(chave)
 
-def save_produtos_drop(produtos_drop):
-    with open(PRODUTOS_DROP_FILE, 'w', encoding='utf-8') as f:
-        json.dump(produtos_drop, f, indent=4, ensure_ascii=False)
+    def iniciar(self, guild_id, user_id, rascunho):
+        chave = self.chave(guild_id, user_id)
+        self.itens.pop(chave, None)
+        rascunho['expira'] = time.time() + self.ttl
+        self.itens[chave] = rascunho
+        self._gravar(chave)
+        self._expirar()
+        return rascunho
 
-config = load_config()
-produtos = load_produtos()
-produtos_drop = load_produtos_drop()
+    def obter(self, guild_id, user_id):
+        self._expirar()
+        return self.itens.get(self.chave(guild_id, user_id))
+
+    def alterado(self, guild_id, user_id):
+        chave = self.chave(guild_id, user_id)
+        rascunho = self.itens.get(chave)
+        if rascunho is not None:
+            rascunho['expira'] = time.time() + self.ttl
+            self.itens.move_to_end(chave)
+            self._gravar(chave)
+
+    def descartar(self, guild_id, user_id):
+        chave = self.chave(guild_id, user_id)
+        if self.itens.pop(chave, None) is not None:
+            self._gravar(chave)
+
+rascunhos = Rascunhos(MAX_RASCUNHOS, TTL_RASCUNHO_MINUTOS * 60, PERSISTIR_RASCUNHOS)
+rascunhos.carregar()
 
 # Verificar se é dono do servidor ou administrador
 def is_owner_or_admin():
@@ -85,6 +1168,29 @@ def is_owner():
 async def on_ready():
     print(f'🤖 Bot conectado como {bot.user}')
     print(f'🎯 Pronto para vendas!')
+
+    # Os dados da época de um servidor só (inquilino 0) vão para o servidor indicado
+    # em INQUILINO_PADRAO_GUILD ou, se o bot estiver em um único servidor, para ele
+    alvo = int(os.getenv('INQUILINO_PADRAO_GUILD', '0'))
+    if not alvo and SHARD_IDS is None and len(bot.guilds) == 1:
+        alvo = bot.guilds[0].id
+    if alvo:
+        if armazenamento.reivindicar_padrao(alvo):
+            inquilinos.descartar(alvo)
+            inquilinos.descartar(INQUILINO_PADRAO)
+            print(f'📦 Dados antigos atribuídos ao servidor {alvo}')
+    elif armazenamento.carregar('produtos', INQUILINO_PADRAO) or armazenamento.carregar('produtos_drop', INQUILINO_PADRAO):
+        print('⚠️ Há dados antigos sem servidor; defina INQUILINO_PADRAO_GUILD para atribuí-los')
+
+    if POOL_CARRINHOS > 0:
+        for guild in bot.guilds:
+            inquilino = inquilinos.obter(guild.id)
+            if not inquilino.config['categorias_ids']:
+                continue
+            categoria = bot.get_channel(inquilino.config['categorias_ids'][0])
+            if categoria:
+                pool_canais.recuperar(categoria)
+
     await bot.change_presence(activity=discord.Activity(
         type=discord.ActivityType.watching, 
         name="vendas | .setup"
@@ -110,512 +1216,577 @@ async def on_command_error(ctx, error):
 @bot.command(name='setup')
 @is_owner_or_admin()
 async def setup(ctx):
+    inquilino = inquilinos.obter(ctx.guild.id)
+    
     embed = discord.Embed(
         title="⚙️ Painel de Configuração",
         description="**Bem-vindo ao sistema de vendas!**\n\nEscolha uma opção abaixo para configurar seu bot:",
         color=discord.Color.blue()
     )
     
-    categoria_status = "✅ Configurada" if config.get('categoria_id') else "❌ Não configurada"
-    pix_status = "✅ Configurado" if config.get('pix_info') != 'Configure seu PIX com o comando .ConfigPix' else "❌ Não configurado"
-    produtos_count = len(produtos)
-    produtos_drop_count = len(produtos_drop)
+    categoria_status = f"✅ {len(inquilino.config['categorias_ids'])} configurada(s)" if inquilino.config['categorias_ids'] else "❌ Não configurada"
+    pix_status = "✅ Configurado" if inquilino.config.get('pix_info') != 'Configure seu PIX com o comando .ConfigPix' else "❌ Não configurado"
+    produtos_count = len(inquilino.produtos)
+    produtos_drop_count = len(inquilino.produtos_drop)
     
     embed.add_field(name="📁 Categoria", value=categoria_status, inline=True)
     embed.add_field(name="💳 PIX", value=pix_status, inline=True)
     embed.add_field(name="📦 Produtos", value=f"{produtos_count} cadastrados", inline=True)
     embed.add_field(name="📋 Produtos Drop", value=f"{produtos_drop_count} cadastrados", inline=True)
     
+    sem_preco = [chave for chave, prod in inquilino.produtos.items() if sem_preco_valido(prod)] + [
+        f"{chave} ({op['nome']})"
+        for chave, drop in inquilino.produtos_drop.items() for op in drop['opcoes'] if sem_preco_valido(op)
+    ]
+    if sem_preco:
+        embed.add_field(
+            name="⚠️ Preço a revisar",
+            value=(
+                f"{len(sem_preco)} item(ns) fora de venda até receber um preço válido: "
+                f"{', '.join(sem_preco[:10])}{'…' if len(sem_preco) > 10 else ''}"
+            )[:1024],
+            inline=False
+        )
+    
     embed.set_footer(text=f"Comando usado por: {ctx.author.name} | Use os botões abaixo para gerenciar o bot")
     
     # Criar botões
-    btn_categoria = Button(label="📁 Configurar Categoria", style=discord.ButtonStyle.primary, row=0)
-    btn_pix = Button(label="💳 Configurar PIX", style=discord.ButtonStyle.primary, row=0)
+    btn_categoria = Button(label="📁 Configurar Categoria", style=discord.ButtonStyle.primary, custom_id="setup:categoria", row=0)
+    btn_pix = Button(label="💳 Configurar PIX", style=discord.ButtonStyle.primary, custom_id="setup:pix", row=0)
     
-    btn_criar_produto = Button(label="➕ Criar Produto", style=discord.ButtonStyle.success, row=1)
-    btn_criar_drop = Button(label="📋 Criar Produto Drop", style=discord.ButtonStyle.success, row=1)
+    btn_criar_produto = Button(label="➕ Criar Produto", style=discord.ButtonStyle.success, custom_id="setup:criar_produto", row=1)
+    btn_criar_drop = Button(label="📋 Criar Produto Drop", style=discord.ButtonStyle.success, custom_id="setup:criar_drop", row=1)
     
-    btn_editar_produto = Button(label="✏️ Editar Produto", style=discord.ButtonStyle.secondary, row=2)
-    btn_editar_drop = Button(label="✏️ Editar Produto Drop", style=discord.ButtonStyle.secondary, row=2)
+    btn_editar_produto = Button(label="✏️ Editar Produto", style=discord.ButtonStyle.secondary, custom_id="setup:editar_produto", row=2)
+    btn_editar_drop = Button(label="✏️ Editar Produto Drop", style=discord.ButtonStyle.secondary, custom_id="setup:editar_drop", row=2)
     
-    btn_enviar_painel = Button(label="📤 Enviar Painel", style=discord.ButtonStyle.success, row=3)
-    btn_enviar_drop = Button(label="📤 Enviar Painel Drop", style=discord.ButtonStyle.success, row=3)
+    btn_enviar_painel = Button(label="📤 Enviar Painel", style=discord.ButtonStyle.success, custom_id="setup:enviar_painel", row=3)
+    btn_enviar_drop = Button(label="📤 Enviar Painel Drop", style=discord.ButtonStyle.success, custom_id="setup:enviar_drop", row=3)
     
-    btn_listar_produtos = Button(label="📋 Listar Produtos", style=discord.ButtonStyle.secondary, row=4)
-    btn_listar_drop = Button(label="📋 Listar Produtos Drop", style=discord.ButtonStyle.secondary, row=4)
+    btn_listar_produtos = Button(label="📋 Listar Produtos", style=discord.ButtonStyle.secondary, custom_id="setup:listar_produtos", row=4)
+    btn_listar_drop = Button(label="📋 Listar Produtos Drop", style=discord.ButtonStyle.secondary, custom_id="setup:listar_drop", row=4)
     
-    # Função para verificar permissões nas interações
-    def check_permissions(interaction):
-        return (interaction.user.id == interaction.guild.owner_id or 
-                interaction.user.guild_permissions.administrator)
+    view = componentes(
+        btn_categoria, btn_pix,
+        btn_criar_produto, btn_criar_drop,
+        btn_editar_produto, btn_editar_drop,
+        btn_enviar_painel, btn_enviar_drop,
+        btn_listar_produtos, btn_listar_drop
+    )
     
-    # Callbacks
-    async def categoria_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        categorias = [cat for cat in interaction.guild.categories]
-        
-        if not categorias:
-            await interaction.response.send_message("❌ Nenhuma categoria encontrada!", ephemeral=True)
-            return
+    await ctx.send(embed=embed, view=view)
+
+# Seletor paginado sobre o índice de títulos: cada página monta só as suas 25 opções,
+# com ◀ ▶ para navegar e busca por trecho do título
+class SeletorCatalogo(View):
+    POR_PAGINA = 25
+
+    def __init__(self, dados, campo, embed, placeholder, descrever, ao_escolher):
+        super().__init__()
+        self.dados = dados
+        self.campo = campo
+        self.embed = embed
+        self.placeholder = placeholder
+        self.descrever = descrever
+        self.ao_escolher = ao_escolher
+        self.itens = indice_titulos(dados, campo)
+        self.pagina = 0
+        self.termo = None
+        self.montar()
+
+    def paginas(self):
+        return max(1, -(-len(self.itens) // self.POR_PAGINA))
+
+    def montar(self):
+        self.clear_items()
         
-        options = [
-            discord.SelectOption(label=cat.name, value=str(cat.id), description=f"ID: {cat.id}")
-            for cat in categorias[:25]
-        ]
+        inicio = self.pagina * self.POR_PAGINA
+        options = []
+        for _, chave in self.itens[inicio:inicio + self.POR_PAGINA]:
+            item = self.dados.get(chave)
+            if item is not None:
+                options.append(discord.SelectOption(label=item[self.campo][:100], value=chave, **self.descrever(item)))
         
-        select = Select(placeholder="Escolha uma categoria...", options=options)
+        if options:
+            select = Select(placeholder=self.placeholder, options=options)
+            select.callback = self.escolher
+            self.add_item(select)
         
-        async def select_callback(select_interaction):
-            if not check_permissions(select_interaction):
-                await select_interaction.response.send_message(
-                    "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                    ephemeral=True
-                )
-                return
-            
-            config['categoria_id'] = int(select.values[0])
-            save_config(config)
-            await select_interaction.response.send_message(
-                f"✅ Categoria configurada com sucesso!",
-                ephemeral=True
-            )
+        anterior = Button(label="◀", style=discord.ButtonStyle.secondary, disabled=self.pagina == 0, row=1)
+        anterior.callback = self.anterior
+        proxima = Button(label="▶", style=discord.ButtonStyle.secondary, disabled=self.pagina >= self.paginas() - 1, row=1)
+        proxima.callback = self.proxima
+        buscar = Button(label="Buscar", emoji="🔍", style=discord.ButtonStyle.primary, row=1)
+        buscar.callback = self.abrir_busca
+        self.add_item(anterior)
+        self.add_item(proxima)
+        self.add_item(buscar)
         
-        select.callback = select_callback
-        view_select = View()
-        view_select.add_item(select)
+        if self.termo:
+            limpar = Button(label="Limpar busca", style=discord.ButtonStyle.secondary, row=1)
+            limpar.callback = self.limpar_busca
+            self.add_item(limpar)
         
-        embed_cat = discord.Embed(
-            title="📁 Configurar Categoria",
-            description="Selecione a categoria onde os carrinhos serão criados:",
-            color=discord.Color.green()
+        filtro = f" | Busca: {self.termo}" if self.termo else ""
+        self.embed.set_footer(text=f"Página {self.pagina + 1}/{self.paginas()} | {len(self.itens)} itens{filtro}")
+
+    async def interaction_check(self, interaction):
+        if eh_dono_ou_admin(interaction):
+            return True
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
         )
-        
-        await interaction.response.send_message(embed=embed_cat, view=view_select, ephemeral=True)
-    
-    async def pix_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
+        return False
+
+    async def atualizar(self, interaction):
+        self.montar()
+        await interaction.response.edit_message(embed=self.embed, view=self)
+
+    async def escolher(self, interaction):
+        chave = interaction.data['values'][0]
+        item = self.dados.get(chave)
+        if item is None:
+            await interaction.response.send_message("❌ Item não encontrado! Ele pode ter sido removido.", ephemeral=True)
             return
-        
-        modal = Modal(title="Configurar PIX")
-        
-        pix_input = TextInput(
-            label="Informações do PIX",
-            placeholder="Ex: Chave PIX: seuemail@exemplo.com\nTitular: Seu Nome",
-            style=discord.TextStyle.paragraph,
-            max_length=500,
-            default=config.get('pix_info', '')
+        await self.ao_escolher(interaction, chave, item)
+
+    async def anterior(self, interaction):
+        self.pagina = max(0, self.pagina - 1)
+        await self.atualizar(interaction)
+
+    async def proxima(self, interaction):
+        self.pagina = min(self.paginas() - 1, self.pagina + 1)
+        await self.atualizar(interaction)
+
+    async def abrir_busca(self, interaction):
+        modal = Modal(title="Buscar")
+        termo_input = TextInput(
+            label="Trecho do título",
+            placeholder="Ex: conta",
+            default=self.termo,
+            max_length=100
         )
-        
-        modal.add_item(pix_input)
+        modal.add_item(termo_input)
         
         async def on_submit(modal_interaction):
-            config['pix_info'] = pix_input.value
-            save_config(config)
-            
-            embed_pix = discord.Embed(
-                title="✅ PIX Configurado",
-                description="Informações do PIX atualizadas com sucesso!",
-                color=discord.Color.green()
-            )
-            
-            await modal_interaction.response.send_message(embed=embed_pix, ephemeral=True)
+            await self.buscar(modal_interaction, termo_input.value.strip())
         
         modal.on_submit = on_submit
         await interaction.response.send_modal(modal)
+
+    async def buscar(self, interaction, termo):
+        indice = indice_titulos(self.dados, self.campo)
+        if termo:
+            busca = termo.casefold()
+            self.itens = [par for par in indice if busca in par[0]]
+        else:
+            self.itens = indice
+        self.termo = termo or None
+        self.pagina = 0
+        await self.atualizar(interaction)
+
+    async def limpar_busca(self, interaction):
+        await self.buscar(interaction, '')
+
+# Callbacks do painel de setup (roteados por custom_id "setup:<ação>")
+async def categoria_callback(interaction):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
     
-    async def criar_produto_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        modal = CriarProdutoModal()
-        await interaction.response.send_modal(modal)
+    categorias = [cat for cat in interaction.guild.categories]
     
-    async def criar_drop_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        modal = CriarProdutoDropModal1()
-        await interaction.response.send_modal(modal)
+    if not categorias:
+        await interaction.response.send_message("❌ Nenhuma categoria encontrada!", ephemeral=True)
+        return
     
-    async def editar_produto_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
+    options = [
+        discord.SelectOption(label=cat.name, value=str(cat.id), description=f"ID: {cat.id}")
+        for cat in categorias[:25]
+    ]
+    
+    select = Select(placeholder="Escolha as categorias...", options=options, max_values=len(options))
+    
+    async def select_callback(select_interaction):
+        inquilino = inquilinos.obter(select_interaction.guild_id)
+        
+        if not eh_dono_ou_admin(select_interaction):
+            await select_interaction.response.send_message(
                 "❌ Você precisa ser Administrador ou Dono do Servidor!",
                 ephemeral=True
             )
             return
         
-        if not produtos:
-            await interaction.response.send_message("❌ Nenhum produto cadastrado!", ephemeral=True)
-            return
-        
-        options = [
-            discord.SelectOption(
-                label=prod['titulo'],
-                value=prod_id,
-                description=f"R$ {prod['preco']}"
-            )
-            for prod_id, prod in produtos.items()
-        ]
-        
-        select = Select(placeholder="Escolha o produto para editar...", options=options[:25])
-        
-        async def select_callback(select_interaction):
-            if not check_permissions(select_interaction):
-                await select_interaction.response.send_message(
-                    "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                    ephemeral=True
-                )
-                return
-            
-            prod_id = select.values[0]
-            produto = produtos[prod_id]
-            
-            modal = EditarProdutoModal(prod_id, produto)
-            await select_interaction.response.send_modal(modal)
-        
-        select.callback = select_callback
-        view_select = View()
-        view_select.add_item(select)
-        
-        embed_edit = discord.Embed(
-            title="✏️ Editar Produto",
-            description="Selecione o produto que deseja editar:",
-            color=discord.Color.blue()
+        inquilino.config['categorias_ids'] = ordenar_categorias(select_interaction.guild, select.values)
+        save_config(inquilino.config, 'categorias_ids')
+        await select_interaction.response.send_message(
+            f"✅ Categoria configurada com sucesso!",
+            ephemeral=True
         )
-        
-        await interaction.response.send_message(embed=embed_edit, view=view_select, ephemeral=True)
     
-    async def editar_drop_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        if not produtos_drop:
-            await interaction.response.send_message("❌ Nenhum painel dropdown cadastrado!", ephemeral=True)
-            return
-        
-        options = [
-            discord.SelectOption(
-                label=drop['titulo_painel'],
-                value=drop_id,
-                description=f"{len(drop['opcoes'])} opções",
-                emoji=drop['emoji_painel']
-            )
-            for drop_id, drop in produtos_drop.items()
-        ]
-        
-        select = Select(placeholder="Escolha o painel dropdown para editar...", options=options[:25])
-        
-        async def select_callback(select_interaction):
-            if not check_permissions(select_interaction):
-                await select_interaction.response.send_message(
-                    "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                    ephemeral=True
-                )
-                return
-            
-            drop_id = select.values[0]
-            painel = produtos_drop[drop_id]
-            
-            modal = EditarProdutoDropModal1(drop_id, painel)
-            await select_interaction.response.send_modal(modal)
-        
-        select.callback = select_callback
-        view_select = View()
-        view_select.add_item(select)
-        
-        embed_edit = discord.Embed(
-            title="✏️ Editar Painel Dropdown",
-            description="Selecione o painel dropdown que deseja editar:",
-            color=discord.Color.blue()
+    select.callback = select_callback
+    view_select = View()
+    view_select.add_item(select)
+    
+    embed_cat = discord.Embed(
+        title="📁 Configurar Categoria",
+        description="Selecione as categorias onde os carrinhos serão criados. Quando uma enche (50 canais), os carrinhos vão para a próxima:",
+        color=discord.Color.green()
+    )
+    
+    await interaction.response.send_message(embed=embed_cat, view=view_select, ephemeral=True)
+
+async def pix_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
         )
-        
-        await interaction.response.send_message(embed=embed_edit, view=view_select, ephemeral=True)
+        return
     
-    async def enviar_painel_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        if not produtos:
-            await interaction.response.send_message("❌ Nenhum produto cadastrado!", ephemeral=True)
-            return
-        
-        options = [
-            discord.SelectOption(
-                label=prod['titulo'],
-                value=prod_id,
-                description=f"R$ {prod['preco']}"
-            )
-            for prod_id, prod in produtos.items()
-        ]
-        
-        select = Select(placeholder="Escolha o produto...", options=options[:25])
-        
-        async def select_callback(select_interaction):
-            if not check_permissions(select_interaction):
-                await select_interaction.response.send_message(
-                    "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                    ephemeral=True
-                )
-                return
-            
-            prod_id = select.values[0]
-            produto = produtos[prod_id]
-            
-            embed_produto = discord.Embed(
-                title=produto['titulo'],
-                description=produto['descricao'],
-                color=discord.Color.gold()
-            )
-            embed_produto.add_field(name="💰 Preço", value=f"R$ {produto['preco']}", inline=True)
-            
-            tipo_imagem = produto.get('tipo_imagem', 'gif')
-            
-            if produto.get('imagem_url'):
-                if tipo_imagem == 'gif':
-                    embed_produto.set_image(url=produto['imagem_url'])
-                else:
-                    embed_produto.set_image(url=produto['imagem_url'])
-            
-            embed_produto.set_footer(text="Clique em 'Comprar' para iniciar sua compra!")
-            
-            button = Button(label="🛒 Comprar", style=discord.ButtonStyle.success)
-            
-            async def comprar_callback(button_interaction):
-                await criar_carrinho(button_interaction, produto, prod_id)
-            
-            button.callback = comprar_callback
-            view_produto = View(timeout=None)
-            view_produto.add_item(button)
-            
-            await select_interaction.channel.send(embed=embed_produto, view=view_produto)
-            await select_interaction.response.send_message("✅ Painel enviado!", ephemeral=True)
+    modal = Modal(title="Configurar PIX")
+    
+    pix_input = TextInput(
+        label="Informações do PIX",
+        placeholder="Ex: Chave PIX: seuemail@exemplo.com\nTitular: Seu Nome",
+        style=discord.TextStyle.paragraph,
+        max_length=500,
+        default=inquilino.config.get('pix_info', '')
+    )
+    
+    modal.add_item(pix_input)
+    
+    async def on_submit(modal_interaction):
+        inquilino = inquilinos.obter(modal_interaction.guild_id)
         
-        select.callback = select_callback
-        view_select = View()
-        view_select.add_item(select)
+        inquilino.config['pix_info'] = pix_input.value
+        save_config(inquilino.config, 'pix_info')
         
-        embed_enviar = discord.Embed(
-            title="📤 Enviar Painel de Produto",
-            description="Selecione o produto que deseja enviar para este canal:",
-            color=discord.Color.blue()
+        embed_pix = discord.Embed(
+            title="✅ PIX Configurado",
+            description="Informações do PIX atualizadas com sucesso!",
+            color=discord.Color.green()
         )
         
-        await interaction.response.send_message(embed=embed_enviar, view=view_select, ephemeral=True)
+        await modal_interaction.response.send_message(embed=embed_pix, ephemeral=True)
     
-    async def enviar_drop_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        if not produtos_drop:
-            await interaction.response.send_message("❌ Nenhum painel dropdown cadastrado!", ephemeral=True)
-            return
-        
-        options = [
-            discord.SelectOption(
-                label=drop['titulo_painel'],
-                value=drop_id,
-                description=f"{len(drop['opcoes'])} opções disponíveis",
-                emoji=drop['emoji_painel']
-            )
-            for drop_id, drop in produtos_drop.items()
-        ]
-        
-        select = Select(placeholder="Escolha o painel dropdown...", options=options[:25])
-        
-        async def select_callback(select_interaction):
-            if not check_permissions(select_interaction):
-                await select_interaction.response.send_message(
-                    "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                    ephemeral=True
-                )
-                return
-            
-            drop_id = select.values[0]
-            painel = produtos_drop[drop_id]
-            
-            embed_painel = discord.Embed(
-                title=f"{painel['emoji_painel']} {painel['titulo_painel']}",
-                description=painel['descricao_painel'],
-                color=discord.Color.gold()
-            )
-            
-            tipo_imagem = painel.get('tipo_imagem', 'gif')
-            
-            if painel.get('imagem_url'):
-                if tipo_imagem == 'gif':
-                    embed_painel.set_image(url=painel['imagem_url'])
-                else:
-                    embed_painel.set_image(url=painel['imagem_url'])
-            
-            embed_painel.set_footer(text="Selecione uma opção no menu abaixo para comprar!")
-            
-            opcoes_select = []
-            for i, opcao in enumerate(painel['opcoes'][:25]):
-                opcoes_select.append(
-                    discord.SelectOption(
-                        label=opcao['nome'],
-                        value=str(i),
-                        description=opcao['descricao'],
-                        emoji=opcao['emoji']
-                    )
-                )
-            
-            produto_select = Select(
-                placeholder="Selecione a quantidade de salas",
-                options=opcoes_select
-            )
-            
-            async def produto_select_callback(prod_select_interaction):
-                opcao_index = int(produto_select.values[0])
-                opcao_selecionada = painel['opcoes'][opcao_index]
-                
-                produto_temp = {
-                    'titulo': f"{painel['titulo_painel']} - {opcao_selecionada['nome']}",
-                    'descricao': f"{painel['descricao_painel']}\n\n**Opção selecionada:** {opcao_selecionada['nome']}",
-                    'preco': opcao_selecionada['preco'],
-                    'imagem_url': painel.get('imagem_url'),
-                    'tipo_imagem': painel.get('tipo_imagem', 'gif')
-                }
-                
-                await criar_carrinho(prod_select_interaction, produto_temp, f"{drop_id}_{opcao_index}")
-            
-            produto_select.callback = produto_select_callback
-            view_painel = View(timeout=None)
-            view_painel.add_item(produto_select)
-            
-            await select_interaction.channel.send(embed=embed_painel, view=view_painel)
-            await select_interaction.response.send_message("✅ Painel dropdown enviado!", ephemeral=True)
-        
-        select.callback = select_callback
-        view_select = View()
-        view_select.add_item(select)
-        
-        embed_enviar = discord.Embed(
-            title="📤 Enviar Painel Dropdown",
-            description="Selecione o painel dropdown que deseja enviar para este canal:",
-            color=discord.Color.blue()
+    modal.on_submit = on_submit
+    await interaction.response.send_modal(modal)
+
+async def criar_produto_callback(interaction):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
         )
-        
-        await interaction.response.send_message(embed=embed_enviar, view=view_select, ephemeral=True)
+        return
     
-    async def listar_produtos_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
-            return
-        
-        if not produtos:
-            await interaction.response.send_message("❌ Nenhum produto cadastrado ainda!", ephemeral=True)
-            return
-        
-        embed_lista = discord.Embed(
-            title="📦 Produtos Cadastrados",
-            color=discord.Color.blue()
+    modal = CriarProdutoModal()
+    await interaction.response.send_modal(modal)
+
+async def criar_drop_callback(interaction):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
         )
-        
-        for prod_id, prod in produtos.items():
-            tipo_img = prod.get('tipo_imagem', 'gif')
-            tipo_texto = "GIF (acima)" if tipo_img == 'gif' else "Banner (embaixo)"
-            embed_lista.add_field(
-                name=f"{prod['titulo']} ({prod_id})",
-                value=f"💰 R$ {prod['preco']}\n📝 {prod['descricao'][:50]}...\n🖼️ {tipo_texto}",
-                inline=False
-            )
-        
-        await interaction.response.send_message(embed=embed_lista, ephemeral=True)
+        return
     
-    async def listar_drop_callback(interaction):
-        if not check_permissions(interaction):
-            await interaction.response.send_message(
-                "❌ Você precisa ser Administrador ou Dono do Servidor!",
-                ephemeral=True
-            )
+    # Rascunho em andamento: retoma de onde parou (ou descarta para começar outro)
+    if rascunhos.obter(interaction.guild_id, interaction.user.id):
+        assistente = AssistenteDrop(interaction.guild_id, interaction.user.id)
+        await interaction.response.send_message(
+            "📝 Você tem um painel dropdown em andamento. Continue de onde parou ou descarte o rascunho:",
+            embed=assistente.embed(), view=assistente, ephemeral=True
+        )
+        return
+    
+    modal = CriarProdutoDropModal1()
+    await interaction.response.send_modal(modal)
+
+async def editar_produto_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    if not inquilino.produtos:
+        await interaction.response.send_message("❌ Nenhum produto cadastrado!", ephemeral=True)
+        return
+    
+    async def escolher(select_interaction, prod_id, produto):
+        modal = EditarProdutoModal(prod_id, produto)
+        await select_interaction.response.send_modal(modal)
+    
+    embed_edit = discord.Embed(
+        title="✏️ Editar Produto",
+        description="Selecione o produto que deseja editar:",
+        color=discord.Color.blue()
+    )
+    
+    view_select = SeletorCatalogo(
+        inquilino.produtos, 'titulo', embed_edit, "Escolha o produto para editar...",
+        lambda prod: {'description': f"R$ {formatar_preco(prod['preco'])}"}, escolher
+    )
+    
+    await interaction.response.send_message(embed=embed_edit, view=view_select, ephemeral=True)
+
+async def editar_drop_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    if not inquilino.produtos_drop:
+        await interaction.response.send_message("❌ Nenhum painel dropdown cadastrado!", ephemeral=True)
+        return
+    
+    async def escolher(select_interaction, drop_id, painel):
+        modal = EditarProdutoDropModal1(drop_id, painel)
+        await select_interaction.response.send_modal(modal)
+    
+    embed_edit = discord.Embed(
+        title="✏️ Editar Painel Dropdown",
+        description="Selecione o painel dropdown que deseja editar:",
+        color=discord.Color.blue()
+    )
+    
+    view_select = SeletorCatalogo(
+        inquilino.produtos_drop, 'titulo_painel', embed_edit, "Escolha o painel dropdown para editar...",
+        lambda drop: {'description': f"{len(drop['opcoes'])} opções", 'emoji': drop['emoji_painel']}, escolher
+    )
+    
+    await interaction.response.send_message(embed=embed_edit, view=view_select, ephemeral=True)
+
+async def enviar_painel_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    if not inquilino.produtos:
+        await interaction.response.send_message("❌ Nenhum produto cadastrado!", ephemeral=True)
+        return
+    
+    async def escolher(select_interaction, prod_id, produto):
+        inquilino = inquilinos.obter(select_interaction.guild_id)
+        if prod_id not in inquilino.produtos:
+            await select_interaction.response.send_message("❌ Item não encontrado! Ele pode ter sido removido.", ephemeral=True)
             return
         
-        if not produtos_drop:
-            await interaction.response.send_message("❌ Nenhum produto dropdown cadastrado ainda!", ephemeral=True)
+        await enviar_painel(inquilino, select_interaction.channel, 'p', prod_id)
+        await select_interaction.response.send_message("✅ Painel enviado!", ephemeral=True)
+    
+    embed_enviar = discord.Embed(
+        title="📤 Enviar Painel de Produto",
+        description="Selecione o produto que deseja enviar para este canal:",
+        color=discord.Color.blue()
+    )
+    
+    view_select = SeletorCatalogo(
+        inquilino.produtos, 'titulo', embed_enviar, "Escolha o produto...",
+        lambda prod: {'description': f"R$ {formatar_preco(prod['preco'])}"}, escolher
+    )
+    
+    await interaction.response.send_message(embed=embed_enviar, view=view_select, ephemeral=True)
+
+async def enviar_drop_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    if not inquilino.produtos_drop:
+        await interaction.response.send_message("❌ Nenhum painel dropdown cadastrado!", ephemeral=True)
+        return
+    
+    async def escolher(select_interaction, drop_id, painel):
+        inquilino = inquilinos.obter(select_interaction.guild_id)
+        if drop_id not in inquilino.produtos_drop:
+            await select_interaction.response.send_message("❌ Item não encontrado! Ele pode ter sido removido.", ephemeral=True)
             return
         
-        embed_lista = discord.Embed(
-            title="📋 Painéis Dropdown Cadastrados",
-            color=discord.Color.blue()
+        await enviar_painel(inquilino, select_interaction.channel, 'd', drop_id)
+        await select_interaction.response.send_message("✅ Painel dropdown enviado!", ephemeral=True)
+    
+    embed_enviar = discord.Embed(
+        title="📤 Enviar Painel Dropdown",
+        description="Selecione o painel dropdown que deseja enviar para este canal:",
+        color=discord.Color.blue()
+    )
+    
+    view_select = SeletorCatalogo(
+        inquilino.produtos_drop, 'titulo_painel', embed_enviar, "Escolha o painel dropdown...",
+        lambda drop: {'description': f"{len(drop['opcoes'])} opções disponíveis", 'emoji': drop['emoji_painel']}, escolher
+    )
+    
+    await interaction.response.send_message(embed=embed_enviar, view=view_select, ephemeral=True)
+
+async def listar_produtos_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    if not inquilino.produtos:
+        await interaction.response.send_message("❌ Nenhum produto cadastrado ainda!", ephemeral=True)
+        return
+    
+    listagem = ListagemPaginada(
+        paginas_listagem(inquilino.produtos, 'titulo', campo_produto, "📦 Produtos Cadastrados")
+    )
+    await interaction.response.send_message(embeds=listagem.embeds(), view=listagem, ephemeral=True)
+
+async def listar_drop_callback(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
         )
+        return
+    
+    if not inquilino.produtos_drop:
+        await interaction.response.send_message("❌ Nenhum produto dropdown cadastrado ainda!", ephemeral=True)
+        return
+    
+    listagem = ListagemPaginada(
+        paginas_listagem(inquilino.produtos_drop, 'titulo_painel', campo_drop, "📋 Painéis Dropdown Cadastrados")
+    )
+    await interaction.response.send_message(embeds=listagem.embeds(), view=listagem, ephemeral=True)
+
+# Listagem do catálogo em páginas. Cada página é uma mensagem com até 10 embeds de até
+# 25 campos, somando no máximo 6000 caracteres (limites do Discord). As páginas são
+# montadas sob demanda, conforme se avança, a partir do índice de títulos
+LIMITE_CAMPOS_EMBED = 25
+LIMITE_EMBEDS_MENSAGEM = 10
+# 6000 menos uma folga para o rodapé com o número da página
+LIMITE_CARACTERES_PAGINA = 5800
+
+def campo_produto(prod_id, prod):
+    tipo_img = prod.get('tipo_imagem', 'gif')
+    tipo_texto = "GIF (acima)" if tipo_img == 'gif' else "Banner (embaixo)"
+    return (
+        f"{prod['titulo']} ({prod_id})",
+        f"💰 R$ {formatar_preco(prod['preco'])}\n📝 {prod['descricao'][:50]}...\n🖼️ {tipo_texto}"
+    )
+
+def campo_drop(drop_id, drop):
+    opcoes_text = "\n".join([f"• {op['nome']} - R$ {formatar_preco(op['preco'])}" for op in drop['opcoes'][:3]])
+    if len(drop['opcoes']) > 3:
+        opcoes_text += f"\n... e mais {len(drop['opcoes']) - 3} opções"
+    
+    tipo_img = drop.get('tipo_imagem', 'gif')
+    tipo_texto = "GIF (acima)" if tipo_img == 'gif' else "Banner (embaixo)"
+    
+    return (
+        f"{drop['emoji_painel']} {drop['titulo_painel']} ({drop_id})",
+        f"**Opções ({len(drop['opcoes'])}):**\n{opcoes_text}\n🖼️ {tipo_texto}"
+    )
+
+def campo_listagem(dados, chave, renderizar):
+    campo = dados.campos.get(chave)
+    if campo is None:
+        nome, valor = renderizar(chave, dados[chave])
+        campo = dados.campos[chave] = (nome[:256], valor[:1024])
+    return campo
+
+def paginas_listagem(dados, campo_titulo, renderizar, titulo):
+    embeds = []
+    total = 0
+    
+    for _, chave in indice_titulos(dados, campo_titulo):
+        if chave not in dados:
+            continue
+        nome, valor = campo_listagem(dados, chave, renderizar)
+        tamanho = len(nome) + len(valor)
         
-        for drop_id, drop in produtos_drop.items():
-            opcoes_text = "\n".join([f"• {op['nome']} - R$ {op['preco']}" for op in drop['opcoes'][:3]])
-            if len(drop['opcoes']) > 3:
-                opcoes_text += f"\n... e mais {len(drop['opcoes']) - 3} opções"
-            
-            tipo_img = drop.get('tipo_imagem', 'gif')
-            tipo_texto = "GIF (acima)" if tipo_img == 'gif' else "Banner (embaixo)"
-            
-            embed_lista.add_field(
-                name=f"{drop['emoji_painel']} {drop['titulo_painel']} ({drop_id})",
-                value=f"**Opções ({len(drop['opcoes'])}):**\n{opcoes_text}\n🖼️ {tipo_texto}",
-                inline=False
-            )
+        cheio = embeds and len(embeds[-1].fields) >= LIMITE_CAMPOS_EMBED
+        if not embeds or total + tamanho > LIMITE_CARACTERES_PAGINA or (cheio and len(embeds) >= LIMITE_EMBEDS_MENSAGEM):
+            if embeds:
+                yield embeds
+            embeds = [discord.Embed(title=titulo, color=discord.Color.blue())]
+            total = len(titulo)
+        elif cheio:
+            embeds.append(discord.Embed(color=discord.Color.blue()))
         
-        await interaction.response.send_message(embed=embed_lista, ephemeral=True)
-    
-    # Atribuir callbacks
-    btn_categoria.callback = categoria_callback
-    btn_pix.callback = pix_callback
-    btn_criar_produto.callback = criar_produto_callback
-    btn_criar_drop.callback = criar_drop_callback
-    btn_editar_produto.callback = editar_produto_callback
-    btn_editar_drop.callback = editar_drop_callback
-    btn_enviar_painel.callback = enviar_painel_callback
-    btn_enviar_drop.callback = enviar_drop_callback
-    btn_listar_produtos.callback = listar_produtos_callback
-    btn_listar_drop.callback = listar_drop_callback
-    
-    # Criar view
-    view = View(timeout=None)
-    view.add_item(btn_categoria)
-    view.add_item(btn_pix)
-    view.add_item(btn_criar_produto)
-    view.add_item(btn_criar_drop)
-    view.add_item(btn_editar_produto)
-    view.add_item(btn_editar_drop)
-    view.add_item(btn_enviar_painel)
-    view.add_item(btn_enviar_drop)
-    view.add_item(btn_listar_produtos)
-    view.add_item(btn_listar_drop)
+        embeds[-1].add_field(name=nome, value=valor, inline=False)
+        total += tamanho
     
-    await ctx.send(embed=embed, view=view)
+    if embeds:
+        yield embeds
+
+class ListagemPaginada(View):
+    def __init__(self, paginas):
+        super().__init__()
+        self.gerador = paginas
+        self.paginas = []
+        self.fim = False
+        self.atual = 0
+        
+        self.anterior = Button(label="◀", style=discord.ButtonStyle.secondary)
+        self.anterior.callback = self.voltar
+        self.proxima = Button(label="▶", style=discord.ButtonStyle.secondary)
+        self.proxima.callback = self.avancar
+        self.add_item(self.anterior)
+        self.add_item(self.proxima)
+
+    def carregar(self, indice):
+        # Gera páginas até a pedida; devolve False se o catálogo acabar antes
+        while len(self.paginas) <= indice and not self.fim:
+            try:
+                self.paginas.append(next(self.gerador))
+            except StopIteration:
+                self.fim = True
+        return indice < len(self.paginas)
+
+    def embeds(self):
+        self.carregar(self.atual)
+        # Carrega uma página à frente para saber se há próxima
+        tem_proxima = self.carregar(self.atual + 1)
+        self.anterior.disabled = self.atual == 0
+        self.proxima.disabled = not tem_proxima
+        
+        embeds = self.paginas[self.atual]
+        total = f"/{len(self.paginas)}" if self.fim else ""
+        embeds[-1].set_footer(text=f"Página {self.atual + 1}{total}")
+        return embeds
+
+    async def voltar(self, interaction):
+        self.atual = max(0, self.atual - 1)
+        await interaction.response.edit_message(embeds=self.embeds(), view=self)
+
+    async def avancar(self, interaction):
+        if self.carregar(self.atual + 1):
+            self.atual += 1
+        await interaction.response.edit_message(embeds=self.embeds(), view=self)
 
 # Comando de ajuda
 @bot.command(name='ajuda')
@@ -649,7 +1820,7 @@ async def ajuda(ctx):
 async def config_categoria(ctx):
     embed = discord.Embed(
         title="⚙️ Configurar Categoria",
-        description="Selecione a categoria onde os carrinhos serão criados:",
+        description="Selecione as categorias onde os carrinhos serão criados. Quando uma enche (50 canais), os carrinhos vão para a próxima:",
         color=discord.Color.green()
     )
     
@@ -664,9 +1835,11 @@ async def config_categoria(ctx):
         for cat in categorias[:25]
     ]
     
-    select = Select(placeholder="Escolha uma categoria...", options=options)
+    select = Select(placeholder="Escolha as categorias...", options=options, max_values=len(options))
     
     async def select_callback(interaction):
+        inquilino = inquilinos.obter(interaction.guild_id)
+        
         # Verificar permissão na interação
         if interaction.user.id != ctx.guild.owner_id and not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message(
@@ -675,10 +1848,10 @@ async def config_categoria(ctx):
             )
             return
         
-        config['categoria_id'] = int(select.values[0])
-        save_config(config)
+        inquilino.config['categorias_ids'] = ordenar_categorias(ctx.guild, select.values)
+        save_config(inquilino.config, 'categorias_ids')
         await interaction.response.send_message(
-            f"✅ Categoria configurada: <#{select.values[0]}>",
+            "✅ Categorias configuradas: " + " ".join(f"<#{cat_id}>" for cat_id in inquilino.config['categorias_ids']),
             ephemeral=True
         )
     
@@ -708,8 +1881,8 @@ class CriarProdutoModal(Modal):
         
         self.preco = TextInput(
             label="Preço (R$)",
-            placeholder="Ex: 29.90",
-            max_length=10
+            placeholder="Ex: 29,90",
+            max_length=15
         )
         
         self.imagem_url = TextInput(
@@ -725,22 +1898,30 @@ class CriarProdutoModal(Modal):
         self.add_item(self.imagem_url)
     
     async def on_submit(self, interaction: discord.Interaction):
+        try:
+            preco = ler_preco(self.preco.value)
+        except ValueError:
+            await interaction.response.send_message("❌ Preço inválido! Use um valor maior que zero, no formato 29,90", ephemeral=True)
+            return
+        
         button_gif = Button(label="🎬 GIF (acima)", style=discord.ButtonStyle.primary)
         button_banner = Button(label="🖼️ Banner (embaixo)", style=discord.ButtonStyle.secondary)
         
         async def gif_callback(btn_interaction):
-            produto_id = f"prod_{len(produtos) + 1}"
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
+            
+            produto_id = await novo_id_produto(inquilino)
             
-            produtos[produto_id] = {
+            inquilino.produtos[produto_id] = {
                 'titulo': self.titulo.value,
                 'descricao': self.descricao.value,
-                'preco': self.preco.value,
+                'preco': preco,
                 'imagem_url': self.imagem_url.value if self.imagem_url.value else None,
                 'tipo_imagem': 'gif',
                 'criado_em': datetime.now().isoformat()
             }
             
-            save_produtos(produtos)
+            save_produtos(inquilino.produtos, produto_id)
             
             embed = discord.Embed(
                 title="✅ Produto Criado com Sucesso!",
@@ -751,18 +1932,20 @@ class CriarProdutoModal(Modal):
             await btn_interaction.response.send_message(embed=embed, ephemeral=True)
         
         async def banner_callback(btn_interaction):
-            produto_id = f"prod_{len(produtos) + 1}"
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
+            
+            produto_id = await novo_id_produto(inquilino)
             
-            produtos[produto_id] = {
+            inquilino.produtos[produto_id] = {
                 'titulo': self.titulo.value,
                 'descricao': self.descricao.value,
-                'preco': self.preco.value,
+                'preco': preco,
                 'imagem_url': self.imagem_url.value if self.imagem_url.value else None,
                 'tipo_imagem': 'banner',
                 'criado_em': datetime.now().isoformat()
             }
             
-            save_produtos(produtos)
+            save_produtos(inquilino.produtos, produto_id)
             
             embed = discord.Embed(
                 title="✅ Produto Criado com Sucesso!",
@@ -810,9 +1993,9 @@ class EditarProdutoModal(Modal):
         
         self.preco = TextInput(
             label="Preço (R$)",
-            placeholder="Ex: 29.90",
-            max_length=10,
-            default=produto['preco']
+            placeholder="Ex: 29,90",
+            max_length=15,
+            default=formatar_preco(produto['preco'])
         )
         
         self.imagem_url = TextInput(
@@ -829,18 +2012,27 @@ class EditarProdutoModal(Modal):
         self.add_item(self.imagem_url)
     
     async def on_submit(self, interaction: discord.Interaction):
+        try:
+            preco = ler_preco(self.preco.value)
+        except ValueError:
+            await interaction.response.send_message("❌ Preço inválido! Use um valor maior que zero, no formato 29,90", ephemeral=True)
+            return
+        
         button_gif = Button(label="🎬 GIF (acima)", style=discord.ButtonStyle.primary)
         button_banner = Button(label="🖼️ Banner (embaixo)", style=discord.ButtonStyle.secondary)
         
         async def gif_callback(btn_interaction):
-            produtos[self.produto_id]['titulo'] = self.titulo.value
-            produtos[self.produto_id]['descricao'] = self.descricao.value
-            produtos[self.produto_id]['preco'] = self.preco.value
-            produtos[self.produto_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
-            produtos[self.produto_id]['tipo_imagem'] = 'gif'
-            produtos[self.produto_id]['editado_em'] = datetime.now().isoformat()
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
+            
+            inquilino.produtos[self.produto_id]['titulo'] = self.titulo.value
+            inquilino.produtos[self.produto_id]['descricao'] = self.descricao.value
+            inquilino.produtos[self.produto_id]['preco'] = preco
+            inquilino.produtos[self.produto_id].pop('preco_original', None)
+            inquilino.produtos[self.produto_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
+            inquilino.produtos[self.produto_id]['tipo_imagem'] = 'gif'
+            inquilino.produtos[self.produto_id]['editado_em'] = datetime.now().isoformat()
             
-            save_produtos(produtos)
+            save_produtos(inquilino.produtos, self.produto_id)
             
             embed = discord.Embed(
                 title="✅ Produto Atualizado!",
@@ -851,14 +2043,17 @@ class EditarProdutoModal(Modal):
             await btn_interaction.response.send_message(embed=embed, ephemeral=True)
         
         async def banner_callback(btn_interaction):
-            produtos[self.produto_id]['titulo'] = self.titulo.value
-            produtos[self.produto_id]['descricao'] = self.descricao.value
-            produtos[self.produto_id]['preco'] = self.preco.value
-            produtos[self.produto_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
-            produtos[self.produto_id]['tipo_imagem'] = 'banner'
-            produtos[self.produto_id]['editado_em'] = datetime.now().isoformat()
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
+            
+            inquilino.produtos[self.produto_id]['titulo'] = self.titulo.value
+            inquilino.produtos[self.produto_id]['descricao'] = self.descricao.value
+            inquilino.produtos[self.produto_id]['preco'] = preco
+            inquilino.produtos[self.produto_id].pop('preco_original', None)
+            inquilino.produtos[self.produto_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
+            inquilino.produtos[self.produto_id]['tipo_imagem'] = 'banner'
+            inquilino.produtos[self.produto_id]['editado_em'] = datetime.now().isoformat()
             
-            save_produtos(produtos)
+            save_produtos(inquilino.produtos, self.produto_id)
             
             embed = discord.Embed(
                 title="✅ Produto Atualizado!",
@@ -917,142 +2112,34 @@ class CriarProdutoDropModal1(Modal):
         
         self.add_item(self.titulo_painel)
         self.add_item(self.descricao_painel)
-        self.add_item(self.emoji_painel)
-        self.add_item(self.imagem_url)
-    
-    async def on_submit(self, interaction: discord.Interaction):
-        button_gif = Button(label="🎬 GIF (acima)", style=discord.ButtonStyle.primary)
-        button_banner = Button(label="🖼️ Banner (embaixo)", style=discord.ButtonStyle.secondary)
-        
-        async def gif_callback(btn_interaction):
-            temp_id = f"temp_{interaction.user.id}"
-            
-            if not hasattr(bot, 'temp_produtos_drop'):
-                bot.temp_produtos_drop = {}
-            
-            bot.temp_produtos_drop[temp_id] = {
-                'titulo_painel': self.titulo_painel.value,
-                'descricao_painel': self.descricao_painel.value,
-                'emoji_painel': self.emoji_painel.value if self.emoji_painel.value else '📦',
-                'imagem_url': self.imagem_url.value if self.imagem_url.value else None,
-                'tipo_imagem': 'gif',
-                'opcoes': []
-            }
-            
-            await btn_interaction.response.send_message(
-                "✅ Painel configurado (GIF)! Agora adicione as opções do dropdown:",
-                ephemeral=True
-            )
-            
-            button_add = Button(label="➕ Adicionar Opção", style=discord.ButtonStyle.success)
-            button_finish = Button(label="✅ Finalizar Painel", style=discord.ButtonStyle.primary)
-            
-            async def add_option_callback(btn_interaction2):
-                modal = CriarOpcaoDropModal(temp_id)
-                await btn_interaction2.response.send_modal(modal)
-            
-            async def finish_callback(btn_interaction2):
-                if len(bot.temp_produtos_drop[temp_id]['opcoes']) == 0:
-                    await btn_interaction2.response.send_message(
-                        "❌ Adicione pelo menos uma opção antes de finalizar!",
-                        ephemeral=True
-                    )
-                    return
-                
-                drop_id = f"drop_{len(produtos_drop) + 1}"
-                produtos_drop[drop_id] = bot.temp_produtos_drop[temp_id]
-                produtos_drop[drop_id]['criado_em'] = datetime.now().isoformat()
-                save_produtos_drop(produtos_drop)
-                
-                del bot.temp_produtos_drop[temp_id]
-                
-                embed = discord.Embed(
-                    title="✅ Painel Dropdown Criado!",
-                    description=f"**ID:** {drop_id}\n**Título:** {produtos_drop[drop_id]['titulo_painel']}\n**Opções:** {len(produtos_drop[drop_id]['opcoes'])}",
-                    color=discord.Color.green()
-                )
-                
-                await btn_interaction2.response.send_message(embed=embed, ephemeral=True)
-            
-            button_add.callback = add_option_callback
-            button_finish.callback = finish_callback
-            
-            view2 = View(timeout=300)
-            view2.add_item(button_add)
-            view2.add_item(button_finish)
-            
-            embed2 = discord.Embed(
-                title="➕ Adicionar Opções ao Dropdown",
-                description=f"**Painel:** {self.titulo_painel.value}\n\nClique em 'Adicionar Opção' para cada produto do dropdown.",
-                color=discord.Color.blue()
-            )
-            
-            await btn_interaction.followup.send(embed=embed2, view=view2, ephemeral=True)
+        self.add_item(self.emoji_painel)
+        self.add_item(self.imagem_url)
+    
+    async def iniciar_rascunho(self, btn_interaction, tipo_imagem):
+        rascunhos.iniciar(btn_interaction.guild_id, btn_interaction.user.id, {
+            'titulo_painel': self.titulo_painel.value,
+            'descricao_painel': self.descricao_painel.value,
+            'emoji_painel': self.emoji_painel.value if self.emoji_painel.value else '📦',
+            'imagem_url': self.imagem_url.value if self.imagem_url.value else None,
+            'tipo_imagem': tipo_imagem,
+            'opcoes': []
+        })
+        
+        assistente = AssistenteDrop(btn_interaction.guild_id, btn_interaction.user.id)
+        await btn_interaction.response.send_message(
+            f"✅ Painel configurado ({'GIF' if tipo_imagem == 'gif' else 'Banner'})! Agora adicione as opções do dropdown:",
+            embed=assistente.embed(), view=assistente, ephemeral=True
+        )
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        button_gif = Button(label="🎬 GIF (acima)", style=discord.ButtonStyle.primary)
+        button_banner = Button(label="🖼️ Banner (embaixo)", style=discord.ButtonStyle.secondary)
+        
+        async def gif_callback(btn_interaction):
+            await self.iniciar_rascunho(btn_interaction, 'gif')
         
         async def banner_callback(btn_interaction):
-            temp_id = f"temp_{interaction.user.id}"
-            
-            if not hasattr(bot, 'temp_produtos_drop'):
-                bot.temp_produtos_drop = {}
-            
-            bot.temp_produtos_drop[temp_id] = {
-                'titulo_painel': self.titulo_painel.value,
-                'descricao_painel': self.descricao_painel.value,
-                'emoji_painel': self.emoji_painel.value if self.emoji_painel.value else '📦',
-                'imagem_url': self.imagem_url.value if self.imagem_url.value else None,
-                'tipo_imagem': 'banner',
-                'opcoes': []
-            }
-            
-            await btn_interaction.response.send_message(
-                "✅ Painel configurado (Banner)! Agora adicione as opções do dropdown:",
-                ephemeral=True
-            )
-            
-            button_add = Button(label="➕ Adicionar Opção", style=discord.ButtonStyle.success)
-            button_finish = Button(label="✅ Finalizar Painel", style=discord.ButtonStyle.primary)
-            
-            async def add_option_callback(btn_interaction2):
-                modal = CriarOpcaoDropModal(temp_id)
-                await btn_interaction2.response.send_modal(modal)
-            
-            async def finish_callback(btn_interaction2):
-                if len(bot.temp_produtos_drop[temp_id]['opcoes']) == 0:
-                    await btn_interaction2.response.send_message(
-                        "❌ Adicione pelo menos uma opção antes de finalizar!",
-                        ephemeral=True
-                    )
-                    return
-                
-                drop_id = f"drop_{len(produtos_drop) + 1}"
-                produtos_drop[drop_id] = bot.temp_produtos_drop[temp_id]
-                produtos_drop[drop_id]['criado_em'] = datetime.now().isoformat()
-                save_produtos_drop(produtos_drop)
-                
-                del bot.temp_produtos_drop[temp_id]
-                
-                embed = discord.Embed(
-                    title="✅ Painel Dropdown Criado!",
-                    description=f"**ID:** {drop_id}\n**Título:** {produtos_drop[drop_id]['titulo_painel']}\n**Opções:** {len(produtos_drop[drop_id]['opcoes'])}",
-                    color=discord.Color.green()
-                )
-                
-                await btn_interaction2.response.send_message(embed=embed, ephemeral=True)
-            
-            button_add.callback = add_option_callback
-            button_finish.callback = finish_callback
-            
-            view2 = View(timeout=300)
-            view2.add_item(button_add)
-            view2.add_item(button_finish)
-            
-            embed2 = discord.Embed(
-                title="➕ Adicionar Opções ao Dropdown",
-                description=f"**Painel:** {self.titulo_painel.value}\n\nClique em 'Adicionar Opção' para cada produto do dropdown.",
-                color=discord.Color.blue()
-            )
-            
-            await btn_interaction.followup.send(embed=embed2, view=view2, ephemeral=True)
+            await self.iniciar_rascunho(btn_interaction, 'banner')
         
         button_gif.callback = gif_callback
         button_banner.callback = banner_callback
@@ -1116,14 +2203,16 @@ class EditarProdutoDropModal1(Modal):
         button_banner = Button(label="🖼️ Banner (embaixo)", style=discord.ButtonStyle.secondary)
         
         async def gif_callback(btn_interaction):
-            produtos_drop[self.drop_id]['titulo_painel'] = self.titulo_painel.value
-            produtos_drop[self.drop_id]['descricao_painel'] = self.descricao_painel.value
-            produtos_drop[self.drop_id]['emoji_painel'] = self.emoji_painel.value if self.emoji_painel.value else '📦'
-            produtos_drop[self.drop_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
-            produtos_drop[self.drop_id]['tipo_imagem'] = 'gif'
-            produtos_drop[self.drop_id]['editado_em'] = datetime.now().isoformat()
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
+            
+            inquilino.produtos_drop[self.drop_id]['titulo_painel'] = self.titulo_painel.value
+            inquilino.produtos_drop[self.drop_id]['descricao_painel'] = self.descricao_painel.value
+            inquilino.produtos_drop[self.drop_id]['emoji_painel'] = self.emoji_painel.value if self.emoji_painel.value else '📦'
+            inquilino.produtos_drop[self.drop_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
+            inquilino.produtos_drop[self.drop_id]['tipo_imagem'] = 'gif'
+            inquilino.produtos_drop[self.drop_id]['editado_em'] = datetime.now().isoformat()
             
-            save_produtos_drop(produtos_drop)
+            save_produtos_drop(inquilino.produtos_drop, self.drop_id)
             
             embed = discord.Embed(
                 title="✅ Painel Atualizado!",
@@ -1134,14 +2223,16 @@ class EditarProdutoDropModal1(Modal):
             await btn_interaction.response.send_message(embed=embed, ephemeral=True)
         
         async def banner_callback(btn_interaction):
-            produtos_drop[self.drop_id]['titulo_painel'] = self.titulo_painel.value
-            produtos_drop[self.drop_id]['descricao_painel'] = self.descricao_painel.value
-            produtos_drop[self.drop_id]['emoji_painel'] = self.emoji_painel.value if self.emoji_painel.value else '📦'
-            produtos_drop[self.drop_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
-            produtos_drop[self.drop_id]['tipo_imagem'] = 'banner'
-            produtos_drop[self.drop_id]['editado_em'] = datetime.now().isoformat()
+            inquilino = inquilinos.obter(btn_interaction.guild_id)
             
-            save_produtos_drop(produtos_drop)
+            inquilino.produtos_drop[self.drop_id]['titulo_painel'] = self.titulo_painel.value
+            inquilino.produtos_drop[self.drop_id]['descricao_painel'] = self.descricao_painel.value
+            inquilino.produtos_drop[self.drop_id]['emoji_painel'] = self.emoji_painel.value if self.emoji_painel.value else '📦'
+            inquilino.produtos_drop[self.drop_id]['imagem_url'] = self.imagem_url.value if self.imagem_url.value else None
+            inquilino.produtos_drop[self.drop_id]['tipo_imagem'] = 'banner'
+            inquilino.produtos_drop[self.drop_id]['editado_em'] = datetime.now().isoformat()
+            
+            save_produtos_drop(inquilino.produtos_drop, self.drop_id)
             
             embed = discord.Embed(
                 title="✅ Painel Atualizado!",
@@ -1166,34 +2257,201 @@ class EditarProdutoDropModal1(Modal):
         
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
-# Modal para adicionar opção ao dropdown
+# Assistente de criação de painel dropdown, sobre o rascunho do admin. Todas as ações
+# redesenham a mesma mensagem: adicionar, editar ou remover opções, finalizar ou descartar
+MAX_OPCOES_DROP = 25
+
+class AssistenteDrop(View):
+    def __init__(self, guild_id, user_id):
+        super().__init__(timeout=rascunhos.ttl)
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.selecionada = None
+        self.aviso = None
+        self.montar()
+
+    def rascunho(self):
+        return rascunhos.obter(self.guild_id, self.user_id)
+
+    def embed(self):
+        rascunho = self.rascunho()
+        if rascunho is None:
+            return discord.Embed(
+                title="⌛ Rascunho expirado",
+                description="Os dados deste painel não estão mais disponíveis. Inicie novamente pelo .setup",
+                color=discord.Color.red()
+            )
+        
+        opcoes = "\n".join(
+            f"{'👉 ' if i == self.selecionada else ''}**{i + 1}.** {op['emoji']} {op['nome']} - R$ {formatar_preco(op['preco'])}"
+            for i, op in enumerate(rascunho['opcoes'])
+        ) or "Nenhuma opção ainda. Clique em 'Adicionar Opção' para cada produto do dropdown."
+        
+        descricao = f"**Painel:** {rascunho['titulo_painel']}\n\n{opcoes}"
+        if self.aviso:
+            descricao = f"{self.aviso}\n\n{descricao}"
+        
+        embed = discord.Embed(
+            title="➕ Adicionar Opções ao Dropdown",
+            description=descricao[:4096],
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"{len(rascunho['opcoes'])}/{MAX_OPCOES_DROP} opções | O rascunho expira após {TTL_RASCUNHO_MINUTOS} min sem uso")
+        return embed
+
+    def montar(self):
+        self.clear_items()
+        rascunho = self.rascunho()
+        if rascunho is None:
+            return
+        
+        if self.selecionada is None:
+            if rascunho['opcoes']:
+                select = Select(
+                    placeholder="✏️ Editar ou remover uma opção...",
+                    options=[
+                        discord.SelectOption(label=f"{i + 1}. {op['nome']}"[:100], value=str(i), description=f"R$ {formatar_preco(op['preco'])}"[:100])
+                        for i, op in enumerate(rascunho['opcoes'])
+                    ]
+                )
+                select.callback = self.selecionar
+                self.add_item(select)
+            
+            botoes = (
+                (Button(label="➕ Adicionar Opção", style=discord.ButtonStyle.success, row=1,
+                        disabled=len(rascunho['opcoes']) >= MAX_OPCOES_DROP), self.adicionar),
+                (Button(label="✅ Finalizar Painel", style=discord.ButtonStyle.primary, row=1), self.finalizar),
+                (Button(label="🗑️ Descartar", style=discord.ButtonStyle.danger, row=1), self.descartar)
+            )
+        else:
+            botoes = (
+                (Button(label="✏️ Editar", style=discord.ButtonStyle.primary, row=1), self.editar),
+                (Button(label="🗑️ Remover", style=discord.ButtonStyle.danger, row=1), self.remover),
+                (Button(label="↩️ Voltar", style=discord.ButtonStyle.secondary, row=1), self.voltar)
+            )
+        
+        for botao, callback in botoes:
+            botao.callback = callback
+            self.add_item(botao)
+
+    async def atualizar(self, interaction, aviso=None):
+        self.aviso = aviso
+        self.montar()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    def opcao_selecionada(self):
+        rascunho = self.rascunho()
+        if rascunho is None or self.selecionada is None or self.selecionada >= len(rascunho['opcoes']):
+            return None
+        return rascunho['opcoes'][self.selecionada]
+
+    async def selecionar(self, interaction):
+        self.selecionada = int(interaction.data['values'][0])
+        await self.atualizar(interaction)
+
+    async def voltar(self, interaction):
+        self.selecionada = None
+        await self.atualizar(interaction)
+
+    async def adicionar(self, interaction):
+        if self.rascunho() is None:
+            await self.atualizar(interaction)
+            return
+        await interaction.response.send_modal(CriarOpcaoDropModal(self))
+
+    async def editar(self, interaction):
+        opcao = self.opcao_selecionada()
+        if opcao is None:
+            self.selecionada = None
+            await self.atualizar(interaction)
+            return
+        await interaction.response.send_modal(CriarOpcaoDropModal(self, self.selecionada, opcao))
+
+    async def remover(self, interaction):
+        opcao = self.opcao_selecionada()
+        if opcao is not None:
+            self.rascunho()['opcoes'].pop(self.selecionada)
+            rascunhos.alterado(self.guild_id, self.user_id)
+        self.selecionada = None
+        await self.atualizar(interaction, f"🗑️ Opção **{opcao['nome']}** removida." if opcao else None)
+
+    async def descartar(self, interaction):
+        rascunhos.descartar(self.guild_id, self.user_id)
+        self.stop()
+        await interaction.response.edit_message(
+            content=None,
+            embed=discord.Embed(title="🗑️ Rascunho descartado", color=discord.Color.red()),
+            view=None
+        )
+
+    async def finalizar(self, interaction):
+        inquilino = inquilinos.obter(interaction.guild_id)
+        rascunho = self.rascunho()
+        
+        if rascunho is None:
+            await self.atualizar(interaction)
+            return
+        
+        if len(rascunho['opcoes']) == 0:
+            await interaction.response.send_message(
+                "❌ Adicione pelo menos uma opção antes de finalizar!",
+                ephemeral=True
+            )
+            return
+        
+        drop_id = await novo_id_drop(inquilino)
+        inquilino.produtos_drop[drop_id] = {chave: valor for chave, valor in rascunho.items() if chave != 'expira'}
+        inquilino.produtos_drop[drop_id]['criado_em'] = datetime.now().isoformat()
+        # Rascunhos salvos antes dos ids de opção
+        garantir_ids_opcoes(inquilino.produtos_drop[drop_id]['opcoes'])
+        save_produtos_drop(inquilino.produtos_drop, drop_id)
+        
+        rascunhos.descartar(self.guild_id, self.user_id)
+        self.stop()
+        
+        embed = discord.Embed(
+            title="✅ Painel Dropdown Criado!",
+            description=f"**ID:** {drop_id}\n**Título:** {inquilino.produtos_drop[drop_id]['titulo_painel']}\n**Opções:** {len(inquilino.produtos_drop[drop_id]['opcoes'])}",
+            color=discord.Color.green()
+        )
+        
+        await interaction.response.edit_message(content=None, embed=embed, view=None)
+
+# Modal para adicionar (ou editar, com indice) uma opção do rascunho do dropdown
 class CriarOpcaoDropModal(Modal):
-    def __init__(self, temp_id):
-        super().__init__(title="Adicionar Opção ao Dropdown")
-        self.temp_id = temp_id
+    def __init__(self, assistente, indice=None, opcao=None):
+        super().__init__(title="Editar Opção do Dropdown" if opcao else "Adicionar Opção ao Dropdown")
+        self.assistente = assistente
+        self.indice = indice
+        opcao = opcao or {}
+        self.opcao_id = opcao.get('id') or id_opcao()
         
         self.nome_opcao = TextInput(
             label="Nome da Opção",
             placeholder="Ex: 10 SALAS",
+            default=opcao.get('nome'),
             max_length=100
         )
         
         self.descricao_opcao = TextInput(
             label="Descrição da Opção",
-            placeholder="Ex: Valor: 2.90",
+            placeholder="Ex: Valor: 2,90",
+            default=opcao.get('descricao'),
             max_length=100,
             required=False
         )
         
         self.preco = TextInput(
             label="Preço (R$)",
-            placeholder="Ex: 2.90",
-            max_length=10
+            placeholder="Ex: 2,90",
+            default=formatar_preco(opcao['preco']) if 'preco' in opcao else None,
+            max_length=15
         )
         
         self.emoji_opcao = TextInput(
             label="Emoji da Opção (opcional)",
             placeholder="Ex: 💰",
+            default=opcao.get('emoji'),
             required=False,
             max_length=10
         )
@@ -1204,59 +2462,294 @@ class CriarOpcaoDropModal(Modal):
         self.add_item(self.emoji_opcao)
     
     async def on_submit(self, interaction: discord.Interaction):
-        if self.temp_id not in bot.temp_produtos_drop:
+        rascunho = self.assistente.rascunho()
+        if rascunho is None:
             await interaction.response.send_message(
-                "❌ Erro: Dados temporários não encontrados. Inicie novamente.",
+                "❌ Erro: Rascunho não encontrado ou expirado. Inicie novamente.",
                 ephemeral=True
             )
             return
         
+        try:
+            preco = ler_preco(self.preco.value)
+        except ValueError:
+            await interaction.response.send_message("❌ Preço inválido! Use um valor maior que zero, no formato 2,90", ephemeral=True)
+            return
+        
         opcao = {
+            'id': self.opcao_id,
             'nome': self.nome_opcao.value,
-            'descricao': self.descricao_opcao.value if self.descricao_opcao.value else f"Valor: {self.preco.value}",
-            'preco': self.preco.value,
+            'descricao': self.descricao_opcao.value if self.descricao_opcao.value else f"Valor: {formatar_preco(preco)}",
+            'preco': preco,
             'emoji': self.emoji_opcao.value if self.emoji_opcao.value else '💎'
         }
         
-        bot.temp_produtos_drop[self.temp_id]['opcoes'].append(opcao)
+        if self.indice is None:
+            if len(rascunho['opcoes']) >= MAX_OPCOES_DROP:
+                await interaction.response.send_message(
+                    f"❌ Um dropdown aceita no máximo {MAX_OPCOES_DROP} opções!",
+                    ephemeral=True
+                )
+                return
+            rascunho['opcoes'].append(opcao)
+            aviso = f"✅ Opção **{opcao['nome']}** adicionada!"
+        elif self.indice < len(rascunho['opcoes']):
+            rascunho['opcoes'][self.indice] = opcao
+            aviso = f"✏️ Opção **{opcao['nome']}** atualizada!"
+        else:
+            aviso = "❌ Essa opção não existe mais."
+        
+        rascunhos.alterado(self.assistente.guild_id, self.assistente.user_id)
+        self.assistente.selecionada = None
+        await self.assistente.atualizar(interaction, aviso)
+
+# Limite de taxa (token bucket) por chave, para não estourar os limites da API do Discord
+class LimitadorTaxa:
+    def __init__(self, quantidade, segundos):
+        self.quantidade = quantidade
+        self.intervalo = segundos / quantidade
+        self.baldes = {}
+
+    async def aguardar(self, chave=None):
+        agora = asyncio.get_running_loop().time()
+        fichas, ultimo = self.baldes.get(chave, (self.quantidade, agora))
+        fichas = min(self.quantidade, fichas + (agora - ultimo) / self.intervalo)
         
-        total_opcoes = len(bot.temp_produtos_drop[self.temp_id]['opcoes'])
+        if fichas < 1:
+            espera = (1 - fichas) * self.intervalo
+            self.baldes[chave] = (fichas - 1, agora)
+            await asyncio.sleep(espera)
+            return
         
-        embed = discord.Embed(
-            title="✅ Opção Adicionada!",
-            description=f"**Nome:** {opcao['nome']}\n**Preço:** R$ {opcao['preco']}\n\n**Total de opções:** {total_opcoes}",
-            color=discord.Color.green()
+        self.baldes[chave] = (fichas - 1, agora)
+
+# Fila de criação de carrinhos: o clique em "Comprar" só adia a resposta e entra na fila;
+# um grupo de workers cria os canais respeitando o limite de criação de canais por servidor
+TAMANHO_FILA_CARRINHOS = int(os.getenv('TAMANHO_FILA_CARRINHOS', '500'))
+WORKERS_CARRINHOS = int(os.getenv('WORKERS_CARRINHOS', '3'))
+LIMITE_CANAIS_QTD = int(os.getenv('LIMITE_CANAIS_QTD', '5'))
+LIMITE_CANAIS_SEGUNDOS = float(os.getenv('LIMITE_CANAIS_SEGUNDOS', '5'))
+
+class FilaCarrinhos:
+    def __init__(self, tamanho, workers):
+        self.fila = asyncio.Queue(maxsize=tamanho)
+        self.workers = workers
+        self.tarefas = []
+
+    def iniciar(self):
+        if not self.tarefas:
+            self.tarefas = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def enfileirar(self, interaction, produto, prod_id, embed):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        try:
+            self.fila.put_nowait((interaction, produto, prod_id, embed))
+        except asyncio.QueueFull:
+            await interaction.edit_original_response(
+                content="❌ Muitas compras ao mesmo tempo! Tente novamente em alguns instantes."
+            )
+            return
+        
+        posicao = self.fila.qsize()
+        if posicao > 1:
+            await interaction.followup.send(
+                f"⏳ Você está na posição **{posicao}** da fila. Seu carrinho será criado em instantes!",
+                ephemeral=True
+            )
+
+    async def worker(self):
+        while True:
+            interaction, produto, prod_id, embed = await self.fila.get()
+            try:
+                await criar_carrinho(interaction, produto, prod_id, embed)
+            except Exception as erro:
+                print(f"Erro ao criar carrinho: {erro}")
+                try:
+                    await interaction.edit_original_response(
+                        content="❌ Não foi possível criar seu carrinho. Tente novamente!"
+                    )
+                except discord.HTTPException:
+                    pass
+            finally:
+                self.fila.task_done()
+
+fila_carrinhos = FilaCarrinhos(TAMANHO_FILA_CARRINHOS, WORKERS_CARRINHOS)
+
+# Limite da rota de criação de canais, compartilhado pelos carrinhos e pela reserva
+limitador_canais = LimitadorTaxa(LIMITE_CANAIS_QTD, LIMITE_CANAIS_SEGUNDOS)
+
+# Categorias de carrinho: lista ordenada em config['categorias_ids']. Cada categoria aceita
+# até 50 canais; o número de canais de cada uma é mantido pelos eventos de criação,
+# exclusão e movimentação de canais, então escolher a categoria é O(1) por categoria.
+# Com todas cheias, uma categoria extra é criada copiando as permissões da primeira
+LIMITE_CANAIS_CATEGORIA = 50
+CRIAR_CATEGORIAS_EXTRAS = os.getenv('CRIAR_CATEGORIAS_EXTRAS', '1') == '1'
+
+def ordenar_categorias(guild, ids):
+    # Segue a ordem das categorias no servidor
+    ids = {int(cat_id) for cat_id in ids}
+    return [cat.id for cat in guild.categories if cat.id in ids]
+
+def categorias_carrinho(guild):
+    inquilino = inquilinos.obter(guild.id)
+    
+    categorias = (guild.get_channel(cat_id) for cat_id in inquilino.config['categorias_ids'])
+    return [cat for cat in categorias if cat]
+
+class VagasCategorias:
+    def __init__(self):
+        self.canais = {}
+        self.reservas = {}
+        self.locks = {}
+
+    def _canais(self, categoria):
+        canais = self.canais.get(categoria.id)
+        if canais is None:
+            canais = {canal.id for canal in categoria.channels}
+            self.canais[categoria.id] = canais
+        return canais
+
+    def livres(self, categoria):
+        return LIMITE_CANAIS_CATEGORIA - len(self._canais(categoria)) - self.reservas.get(categoria.id, 0)
+
+    def reservar_em(self, categoria):
+        if self.livres(categoria) <= 0:
+            return False
+        self.reservas[categoria.id] = self.reservas.get(categoria.id, 0) + 1
+        return True
+
+    def confirmar(self, categoria, canal=None):
+        self.reservas[categoria.id] -= 1
+        if canal:
+            self._canais(categoria).add(canal.id)
+
+    async def reservar(self, guild):
+        lock = self.locks.setdefault(guild.id, asyncio.Lock())
+        
+        async with lock:
+            categorias = categorias_carrinho(guild)
+            for categoria in categorias:
+                if self.reservar_em(categoria):
+                    return categoria
+            
+            if not categorias or not CRIAR_CATEGORIAS_EXTRAS:
+                return None
+            
+            categoria = await self.criar_extra(guild, categorias[0], len(categorias) + 1)
+            self.reservar_em(categoria)
+            return categoria
+
+    async def criar_extra(self, guild, base, numero):
+        inquilino = inquilinos.obter(guild.id)
+        
+        categoria = await guild.create_category(
+            name=f"{base.name} {numero}",
+            overwrites=base.overwrites,
+            reason="Categorias de carrinho cheias"
         )
+        self.canais[categoria.id] = set()
+        inquilino.config['categorias_ids'].append(categoria.id)
+        save_config(inquilino.config, 'categorias_ids')
+        return categoria
+
+    def canal_criado(self, canal):
+        if canal.category_id in self.canais:
+            self.canais[canal.category_id].add(canal.id)
+
+    def canal_apagado(self, canal):
+        if canal.category_id in self.canais:
+            self.canais[canal.category_id].discard(canal.id)
+
+    def canal_movido(self, antes, depois):
+        if antes.category_id != depois.category_id:
+            self.canal_apagado(antes)
+            self.canal_criado(depois)
+
+vagas_categorias = VagasCategorias()
+
+# Reserva de canais pré-criados (POOL_CARRINHOS > 0): canais ocultos ficam prontos na
+# primeira categoria de carrinhos e, na compra, basta uma edição (nome + permissões) para virar o carrinho.
+# A reserva é reposta em segundo plano e recuperada pelo nome ao reiniciar o bot
+POOL_CARRINHOS = int(os.getenv('POOL_CARRINHOS', '0'))
+PREFIXO_RESERVA = 'reserva-carrinho'
+
+class PoolCanais:
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.canais = {}
+        self.reabastecendo = set()
+
+    def recuperar(self, categoria):
+        if categoria.id in self.canais:
+            return
+        self.canais[categoria.id] = [
+            canal.id for canal in categoria.text_channels if canal.name.startswith(PREFIXO_RESERVA)
+        ]
+        self.agendar_reabastecimento(categoria)
+
+    def retirar(self, categoria):
+        if self.tamanho > 0:
+            self.recuperar(categoria)
         
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        reserva = self.canais.get(categoria.id, [])
+        while reserva:
+            canal = categoria.guild.get_channel(reserva.pop())
+            if canal:
+                return canal
+        return None
+
+    def remover(self, canal_id):
+        for reserva in self.canais.values():
+            if canal_id in reserva:
+                reserva.remove(canal_id)
+
+    def agendar_reabastecimento(self, categoria):
+        if self.tamanho > 0 and categoria.id not in self.reabastecendo:
+            self.reabastecendo.add(categoria.id)
+            asyncio.create_task(self.reabastecer(categoria))
+
+    async def reabastecer(self, categoria):
+        guild = categoria.guild
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
+        
+        try:
+            reserva = self.canais.setdefault(categoria.id, [])
+            while len(reserva) < self.tamanho and vagas_categorias.reservar_em(categoria):
+                canal = None
+                try:
+                    await limitador_canais.aguardar(guild.id)
+                    canal = await categoria.create_text_channel(
+                        name=f"{PREFIXO_RESERVA}-{len(reserva) + 1}",
+                        overwrites=overwrites
+                    )
+                finally:
+                    vagas_categorias.confirmar(categoria, canal)
+                reserva.append(canal.id)
+        except discord.HTTPException as erro:
+            print(f"Erro ao repor a reserva de canais: {erro}")
+        finally:
+            self.reabastecendo.discard(categoria.id)
+
+pool_canais = PoolCanais(POOL_CARRINHOS)
 
-# Função para criar carrinho
-async def criar_carrinho(interaction, produto, prod_id):
+# Função para criar carrinho (roda nos workers da fila; a interação já foi adiada)
+async def criar_carrinho(interaction, produto, prod_id, embed_carrinho):
     guild = interaction.guild
     user = interaction.user
     
-    if not config.get('categoria_id'):
-        await interaction.response.send_message(
-            "❌ Categoria não configurada! Peça ao administrador para usar .setup",
-            ephemeral=True
-        )
-        return
+    categorias = categorias_carrinho(guild)
     
-    categoria = guild.get_channel(config['categoria_id'])
-    
-    if not categoria:
-        await interaction.response.send_message(
-            "❌ Categoria não encontrada! Peça ao administrador para reconfigurar.",
-            ephemeral=True
+    if not categorias:
+        await interaction.edit_original_response(
+            content="❌ Categoria não configurada! Peça ao administrador para usar .setup"
         )
         return
     
-    if str(guild.id) not in config['contador_carrinhos']:
-        config['contador_carrinhos'][str(guild.id)] = 0
-    
-    numero = config['contador_carrinhos'][str(guild.id)]
-    config['contador_carrinhos'][str(guild.id)] += 1
-    save_config(config)
+    numero = await numeros_carrinho.proximo(guild.id)
     
     overwrites = {
         guild.default_role: discord.PermissionOverwrite(read_messages=False),
@@ -1265,16 +2758,160 @@ async def criar_carrinho(interaction, produto, prod_id):
     }
     
     nome_canal = f"🚀{user.name}-{numero}"
-    canal = await categoria.create_text_channel(name=nome_canal, overwrites=overwrites)
+    canal = pool_canais.retirar(categorias[0])
+    if canal:
+        await canal.edit(name=nome_canal, overwrites=overwrites)
+    else:
+        categoria = await vagas_categorias.reservar(guild)
+        if not categoria:
+            await interaction.edit_original_response(
+                content="❌ Todas as categorias de carrinho estão cheias! Tente novamente mais tarde."
+            )
+            return
+        
+        try:
+            await limitador_canais.aguardar(guild.id)
+            canal = await categoria.create_text_channel(name=nome_canal, overwrites=overwrites)
+        finally:
+            vagas_categorias.confirmar(categoria, canal)
+    pool_canais.agendar_reabastecimento(categorias[0])
+    
+    embed_carrinho.add_field(name="👤 Cliente", value=user.mention, inline=True)
+    
+    carrinhos.adicionar(Carrinho(
+        id=f"{guild.id}-{numero}",
+        guild_id=guild.id,
+        canal_id=canal.id,
+        comprador_id=user.id,
+        produto_id=prod_id,
+        preco=produto['preco'],
+        titulo=produto['titulo']
+    ))
+    
+    await canal.send(f"{user.mention}", embed=embed_carrinho, view=carrinho_view(canal.id))
+    
+    await interaction.edit_original_response(content=f"✅ Carrinho criado! Acesse {canal.mention}")
+
+# Componentes sem estado: toda a informação necessária está no custom_id
+# ("painel:<prod_id>:comprar", "drop:<drop_id>:comprar", "carrinho:<canal_id>:<ação>",
+# "setup:<ação>") e um único roteador em on_interaction atende todos os cliques.
+# A View serve só de molde e é parada antes do envio, então o discord.py não a
+# guarda na memória: o consumo não cresce com o número de painéis e carrinhos.
+def componentes(*itens):
+    view = View(timeout=None)
+    for item in itens:
+        view.add_item(item)
+    view.stop()
+    return view
+
+def opcoes_drop(painel):
+    return [
+        discord.SelectOption(
+            label=opcao['nome'],
+            value=str(i),
+            description=opcao['descricao'],
+            emoji=opcao['emoji']
+        )
+        for i, opcao in enumerate(painel['opcoes'][:25])
+    ]
+
+# Embeds dos painéis de venda e dos carrinhos. Os prontos ficam num cache LRU como dict
+# (payload da API), por (tipo, servidor, item, versão do item): gravar um item muda a
+# versão, então o embed antigo simplesmente deixa de ser usado
+TAMANHO_CACHE_EMBEDS = int(os.getenv('TAMANHO_CACHE_EMBEDS', '2000'))
+
+class CacheEmbeds:
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self.cache = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, tipo, dados, chave, montar, variante=None):
+        chave_cache = (tipo, dados.guild_id, chave, variante, versao_item(dados, chave))
+        payload = self.cache.get(chave_cache)
+        if payload is None:
+            self.falhas += 1
+            payload = montar().to_dict()
+            self.cache[chave_cache] = payload
+            if len(self.cache) > self.maximo:
+                self.cache.popitem(last=False)
+        else:
+            self.acertos += 1
+            self.cache.move_to_end(chave_cache)
+        
+        # A lista de campos é copiada: quem recebe o embed pode adicionar campos
+        return discord.Embed.from_dict({**payload, 'fields': [dict(campo) for campo in payload.get('fields', ())]})
+
+cache_embeds = CacheEmbeds(TAMANHO_CACHE_EMBEDS)
+
+def embed_painel_produto(produtos, prod_id):
+    return cache_embeds.obter('painel_produto', produtos, prod_id, lambda: montar_painel_produto(produtos[prod_id]))
+
+def embed_painel_drop(produtos_drop, drop_id):
+    return cache_embeds.obter('painel_drop', produtos_drop, drop_id, lambda: montar_painel_drop(produtos_drop[drop_id]))
+
+def embed_carrinho_produto(produtos, prod_id):
+    return cache_embeds.obter('carrinho', produtos, prod_id, lambda: montar_carrinho(produtos[prod_id]))
+
+def embed_carrinho_drop(produtos_drop, drop_id, opcao_index):
+    def montar():
+        painel = produtos_drop[drop_id]
+        opcao_selecionada = painel['opcoes'][opcao_index]
+        return montar_carrinho({
+            'titulo': f"{painel['titulo_painel']} - {opcao_selecionada['nome']}",
+            'descricao': f"{painel['descricao_painel']}\n\n**Opção selecionada:** {opcao_selecionada['nome']}",
+            'preco': opcao_selecionada['preco'],
+            'imagem_url': painel.get('imagem_url'),
+            'tipo_imagem': painel.get('tipo_imagem', 'gif')
+        })
+    return cache_embeds.obter('carrinho', produtos_drop, drop_id, montar, opcao_index)
+
+def montar_painel_produto(produto):
+    embed_produto = discord.Embed(
+        title=produto['titulo'],
+        description=produto['descricao'],
+        color=discord.Color.gold()
+    )
+    embed_produto.add_field(name="💰 Preço", value=f"R$ {formatar_preco(produto['preco'])}", inline=True)
+    
+    tipo_imagem = produto.get('tipo_imagem', 'gif')
+    
+    if produto.get('imagem_url'):
+        if tipo_imagem == 'gif':
+            embed_produto.set_image(url=produto['imagem_url'])
+        else:
+            embed_produto.set_image(url=produto['imagem_url'])
+    
+    embed_produto.set_footer(text="Clique em 'Comprar' para iniciar sua compra!")
+    return embed_produto
+
+def montar_painel_drop(painel):
+    embed_painel = discord.Embed(
+        title=f"{painel['emoji_painel']} {painel['titulo_painel']}",
+        description=painel['descricao_painel'],
+        color=discord.Color.gold()
+    )
+    
+    tipo_imagem = painel.get('tipo_imagem', 'gif')
+    
+    if painel.get('imagem_url'):
+        if tipo_imagem == 'gif':
+            embed_painel.set_image(url=painel['imagem_url'])
+        else:
+            embed_painel.set_image(url=painel['imagem_url'])
     
+    embed_painel.set_footer(text="Selecione uma opção no menu abaixo para comprar!")
+    return embed_painel
+
+def montar_carrinho(produto):
     embed_carrinho = discord.Embed(
         title=f"🛒 Carrinho de Compra - {produto['titulo']}",
         description=produto['descricao'],
         color=discord.Color.blue()
     )
     
-    embed_carrinho.add_field(name="💰 Valor", value=f"R$ {produto['preco']}", inline=True)
-    embed_carrinho.add_field(name="👤 Cliente", value=user.mention, inline=True)
+    embed_carrinho.add_field(name="💰 Valor", value=f"R$ {formatar_preco(produto['preco'])}", inline=True)
     
     tipo_imagem = produto.get('tipo_imagem', 'gif')
     
@@ -1284,58 +2921,346 @@ async def criar_carrinho(interaction, produto, prod_id):
         else:
             embed_carrinho.set_image(url=produto['imagem_url'])
     
-    embed_carrinho.set_footer(text="Use os botões abaixo para gerenciar o pagamento")
+    embed_carrinho.set_footer(text="Use os botões abaixo para gerenciar o pagamento")
+    return embed_carrinho
+
+def painel_produto_view(prod_id):
+    return componentes(
+        Button(label="🛒 Comprar", style=discord.ButtonStyle.success, custom_id=f"painel:{prod_id}:comprar")
+    )
+
+def painel_drop_view(drop_id, painel):
+    return componentes(
+        Select(
+            placeholder="Selecione a quantidade de salas",
+            options=opcoes_drop(painel),
+            custom_id=f"drop:{drop_id}:comprar"
+        )
+    )
+
+def carrinho_view(canal_id):
+    return componentes(
+        Button(label="💳 PIX", style=discord.ButtonStyle.primary, custom_id=f"carrinho:{canal_id}:pix"),
+        Button(label="✅ Aprovar Pagamento", style=discord.ButtonStyle.success, custom_id=f"carrinho:{canal_id}:aprovar"),
+        Button(label="🔒 Fechar", style=discord.ButtonStyle.danger, custom_id=f"carrinho:{canal_id}:fechar")
+    )
+
+# Envia um painel de venda e registra a mensagem para que ela acompanhe as edições do item
+async def enviar_painel(inquilino, canal, tipo, item_id):
+    if tipo == 'p':
+        mensagem = await canal.send(
+            embed=embed_painel_produto(inquilino.produtos, item_id), view=painel_produto_view(item_id)
+        )
+    else:
+        painel = inquilino.produtos_drop[item_id]
+        mensagem = await canal.send(
+            embed=embed_painel_drop(inquilino.produtos_drop, item_id), view=painel_drop_view(item_id, painel)
+        )
+    
+    inquilino.paineis[str(mensagem.id)] = {'tipo': tipo, 'item': item_id, 'canal': canal.id}
+    save_paineis(inquilino.paineis, str(mensagem.id))
+    return mensagem
+
+# Atualização dos painéis já enviados. A primeira gravação de um item agenda a atualização
+# para daqui a ATRASO_PAINEIS_SEGUNDOS; gravações seguintes nesse intervalo só aproveitam
+# a mesma atualização, que usa o estado mais recente do item. Assim cada mensagem recebe no
+# máximo uma edição por intervalo, e as edições respeitam um limite por canal
+ATRASO_PAINEIS_SEGUNDOS = float(os.getenv('ATRASO_PAINEIS_SEGUNDOS', '60'))
+LIMITE_EDICOES_QTD = int(os.getenv('LIMITE_EDICOES_QTD', '5'))
+LIMITE_EDICOES_SEGUNDOS = float(os.getenv('LIMITE_EDICOES_SEGUNDOS', '5'))
+
+class AtualizadorPaineis:
+    def __init__(self, atraso, limitador):
+        self.atraso = atraso
+        self.limitador = limitador
+        # (guild_id, tipo, item_id) com atualização agendada
+        self.pendentes = set()
+
+    def agendar(self, guild_id, tipo, item_ids):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        for item_id in item_ids:
+            chave = (guild_id, tipo, item_id)
+            if chave not in self.pendentes:
+                self.pendentes.add(chave)
+                loop.create_task(self._atualizar_depois(chave))
+
+    async def _atualizar_depois(self, chave):
+        await asyncio.sleep(self.atraso)
+        self.pendentes.discard(chave)
+        try:
+            await self.atualizar(*chave)
+        except Exception as erro:
+            print(f"Erro ao atualizar painéis de {chave[2]}: {erro}")
+
+    async def atualizar(self, guild_id, tipo, item_id):
+        inquilino = inquilinos.obter(guild_id)
+        dados = inquilino.produtos if tipo == 'p' else inquilino.produtos_drop
+        item = dados.get(item_id)
+        if item is None:
+            return
+        
+        mensagens = [
+            (mensagem_id, painel['canal']) for mensagem_id, painel in inquilino.paineis.items()
+            if painel['tipo'] == tipo and painel['item'] == item_id
+        ]
+        if not mensagens:
+            return
+        
+        if tipo == 'p':
+            view = painel_produto_view(item_id)
+        else:
+            view = painel_drop_view(item_id, item)
+        
+        for mensagem_id, canal_id in mensagens:
+            canal = bot.get_channel(canal_id)
+            if canal is None:
+                self.esquecer(inquilino, mensagem_id)
+                continue
+            
+            embed = embed_painel_produto(dados, item_id) if tipo == 'p' else embed_painel_drop(dados, item_id)
+            await self.limitador.aguardar(canal_id)
+            try:
+                await canal.get_partial_message(int(mensagem_id)).edit(embed=embed, view=view)
+            except discord.NotFound:
+                self.esquecer(inquilino, mensagem_id)
+            except discord.HTTPException as erro:
+                print(f"Erro ao editar painel {mensagem_id}: {erro}")
+
+    def esquecer(self, inquilino, mensagem_id):
+        if inquilino.paineis.pop(str(mensagem_id), None) is not None:
+            save_paineis(inquilino.paineis, str(mensagem_id))
+
+atualizador_paineis = AtualizadorPaineis(
+    ATRASO_PAINEIS_SEGUNDOS,
+    LimitadorTaxa(LIMITE_EDICOES_QTD, LIMITE_EDICOES_SEGUNDOS)
+)
+
+async def comprar_produto(interaction, prod_id):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    produto = inquilino.produtos.get(prod_id)
+    
+    if not produto:
+        await interaction.response.send_message("❌ Este produto não está mais disponível!", ephemeral=True)
+        return
+    if sem_preco_valido(produto):
+        await interaction.response.send_message("❌ Este produto está sem preço no momento! Avise a administração.", ephemeral=True)
+        return
+    
+    await fila_carrinhos.enfileirar(interaction, produto, prod_id, embed_carrinho_produto(inquilino.produtos, prod_id))
+
+async def comprar_opcao_drop(interaction, drop_id, opcao_index):
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    painel = inquilino.produtos_drop.get(drop_id)
+    
+    if not painel or opcao_index >= len(painel['opcoes']):
+        await interaction.response.send_message("❌ Esta opção não está mais disponível!", ephemeral=True)
+        return
+    
+    opcao_selecionada = painel['opcoes'][opcao_index]
+    if sem_preco_valido(opcao_selecionada):
+        await interaction.response.send_message("❌ Esta opção está sem preço no momento! Avise a administração.", ephemeral=True)
+        return
+    
+    await fila_carrinhos.enfileirar(
+        interaction,
+        dict(opcao_selecionada, titulo=f"{painel['titulo_painel']} - {opcao_selecionada['nome']}"),
+        f"{drop_id}:{opcao_selecionada['id']}",
+        embed_carrinho_drop(inquilino.produtos_drop, drop_id, opcao_index)
+    )
+
+def eh_dono_ou_admin(interaction):
+    return (interaction.user.id == interaction.guild.owner_id or
+            interaction.user.guild_permissions.administrator)
+
+# Carrinhos abertos antes do índice de carrinhos não têm registro:
+# nesse caso o comprador e o valor são lidos da própria mensagem do carrinho
+def dados_carrinho(interaction):
+    carrinho = carrinhos.por_canal(interaction.channel_id)
+    if carrinho:
+        return carrinho.comprador_id, f"R$ {formatar_preco(carrinho.preco)}"
+    
+    mensagem = interaction.message
+    comprador_id = mensagem.raw_mentions[0] if mensagem.raw_mentions else None
+    for campo in mensagem.embeds[0].fields if mensagem.embeds else []:
+        if campo.name == "💰 Valor":
+            return comprador_id, campo.value
+    return comprador_id, None
+
+async def aprovar_carrinho(interaction):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Apenas o dono ou administradores podem aprovar pagamentos!",
+            ephemeral=True
+        )
+        return
+    
+    # Responde antes de gravar: com o banco ocupado, a gravação pode passar dos 3s da interação
+    await interaction.response.defer()
+    
+    comprador_id, _ = dados_carrinho(interaction)
+    carrinho = carrinhos.por_canal(interaction.channel_id)
+    if carrinho:
+        # Carrinhos anteriores ao registro em banco não têm produto nem preço confiáveis e
+        # ficam fora do livro de vendas
+        await asyncio.to_thread(armazenamento.registrar_venda, {
+            'guild_id': carrinho.guild_id,
+            'carrinho_id': carrinho.id,
+            'produto_id': carrinho.produto_id,
+            'comprador_id': carrinho.comprador_id,
+            'preco': carrinho.preco,
+            'criado_em': carrinho.criado_em,
+            'aprovado_em': datetime.now().isoformat(),
+            'titulo': carrinho.titulo or nome_produto_venda(inquilinos.obter(carrinho.guild_id), carrinho.produto_id)
+        })
+        carrinhos.atualizar(carrinho, status='aprovado')
+        carrinhos.tocar(carrinho)
+    
+    comprador = f"<@{comprador_id}>" if comprador_id else ""
+    await interaction.followup.send(
+        f"✅ Pagamento aprovado! {comprador}, obrigado pela compra! 🎉"
+    )
+
+async def fechar_carrinho(interaction):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Apenas o dono ou administradores podem fechar o carrinho!",
+            ephemeral=True
+        )
+        return
+    
+    await interaction.response.send_message("🔒 Fechando carrinho em 5 segundos...")
+    await asyncio.sleep(5)
+    carrinhos.remover(interaction.channel_id)
+    await interaction.channel.delete()
+
+async def pix_carrinho(interaction):
+    inquilino = inquilinos.obter(interaction.guild_id)
     
-    aprovar_btn = Button(label="✅ Aprovar Pagamento", style=discord.ButtonStyle.success)
-    fechar_btn = Button(label="🔒 Fechar", style=discord.ButtonStyle.danger)
-    pix_btn = Button(label="💳 PIX", style=discord.ButtonStyle.primary)
+    _, valor = dados_carrinho(interaction)
     
-    async def aprovar_callback(btn_interaction):
-        if btn_interaction.user.id != guild.owner_id and not btn_interaction.user.guild_permissions.administrator:
-            await btn_interaction.response.send_message(
-                "❌ Apenas o dono ou administradores podem aprovar pagamentos!",
-                ephemeral=True
-            )
+    embed_pix = discord.Embed(
+        title="💳 Informações PIX",
+        description=inquilino.config.get('pix_info', 'Configure o PIX com .setup'),
+        color=discord.Color.gold()
+    )
+    embed_pix.add_field(name="💰 Valor a Pagar", value=valor, inline=False)
+    embed_pix.set_footer(text="Após realizar o pagamento, envie o comprovante neste canal")
+    await interaction.response.send_message(embed=embed_pix, ephemeral=True)
+
+# Expiração automática de carrinhos abandonados. Os prazos ficam num min-heap com um
+# índice por carrinho: reagendar só empurra um novo prazo e os antigos são descartados
+# ao sair do heap. Antes de fechar, o carrinho recebe um aviso.
+TTL_CARRINHO_HORAS = float(os.getenv('TTL_CARRINHO_HORAS', '24'))
+AVISO_CARRINHO_MINUTOS = float(os.getenv('AVISO_CARRINHO_MINUTOS', '60'))
+LIMITE_EXCLUSOES_QTD = int(os.getenv('LIMITE_EXCLUSOES_QTD', '5'))
+LIMITE_EXCLUSOES_SEGUNDOS = float(os.getenv('LIMITE_EXCLUSOES_SEGUNDOS', '5'))
+
+class VarredorCarrinhos:
+    def __init__(self, ttl, aviso, limitador):
+        self.ttl = ttl
+        self.aviso = min(aviso, ttl)
+        self.limitador = limitador
+        self.heap = []
+        self.prazos = {}
+        self.acordar = asyncio.Event()
+        self.tarefa = None
+
+    def iniciar(self):
+        if self.ttl <= 0 or self.tarefa:
+            return
+        for carrinho in carrinhos.por_id.values():
+            self.agendar(carrinho)
+        self.tarefa = asyncio.create_task(self.rodar())
+
+    def agendar(self, carrinho):
+        if self.ttl <= 0:
             return
         
-        await btn_interaction.response.send_message(
-            f"✅ Pagamento aprovado! {user.mention}, obrigado pela compra! 🎉"
-        )
-    
-    async def fechar_callback(btn_interaction):
-        if btn_interaction.user.id != guild.owner_id and not btn_interaction.user.guild_permissions.administrator:
-            await btn_interaction.response.send_message(
-                "❌ Apenas o dono ou administradores podem fechar o carrinho!",
-                ephemeral=True
+        prazo = carrinho.ultima_atividade() + self.ttl
+        if not carrinho.avisado:
+            prazo -= self.aviso
+        
+        self.prazos[carrinho.id] = prazo
+        heapq.heappush(self.heap, (prazo, carrinho.id))
+        
+        # Muitos prazos antigos acumulados: reconstrói o heap só com os atuais
+        if len(self.heap) > 2 * len(self.prazos) + 64:
+            self.heap = [(p, c) for c, p in self.prazos.items()]
+            heapq.heapify(self.heap)
+        if self.heap[0][1] == carrinho.id:
+            self.acordar.set()
+
+    def cancelar(self, carrinho_id):
+        self.prazos.pop(carrinho_id, None)
+
+    def _descartar_antigos(self):
+        while self.heap and self.prazos.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    async def rodar(self):
+        await bot.wait_until_ready()
+        
+        while True:
+            self._descartar_antigos()
+            espera = self.heap[0][0] - time.time() if self.heap else None
+            
+            if espera is None or espera > 0:
+                self.acordar.clear()
+                try:
+                    await asyncio.wait_for(self.acordar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            # Processa de uma vez todos os carrinhos vencidos
+            agora = time.time()
+            vencidos = []
+            while self.heap and self.heap[0][0] <= agora:
+                prazo, carrinho_id = heapq.heappop(self.heap)
+                if self.prazos.get(carrinho_id) == prazo:
+                    del self.prazos[carrinho_id]
+                    vencidos.append(carrinho_id)
+                self._descartar_antigos()
+            
+            for carrinho_id in vencidos:
+                carrinho = carrinhos.por_id.get(carrinho_id)
+                if carrinho:
+                    try:
+                        await self.processar(carrinho)
+                    except Exception as erro:
+                        print(f"Erro ao expirar carrinho {carrinho_id}: {erro}")
+
+    async def processar(self, carrinho):
+        canal = bot.get_channel(carrinho.canal_id)
+        
+        if not canal:
+            carrinhos.remover(carrinho.canal_id)
+            return
+        
+        if not carrinho.avisado:
+            carrinhos.atualizar(carrinho, avisado=True)
+            self.agendar(carrinho)
+            await canal.send(
+                f"⏰ <@{carrinho.comprador_id}>, este carrinho será fechado em "
+                f"{int(self.aviso // 60)} minutos por inatividade. Envie uma mensagem para mantê-lo aberto."
             )
             return
         
-        await btn_interaction.response.send_message("🔒 Fechando carrinho em 5 segundos...")
-        await asyncio.sleep(5)
-        await canal.delete()
-    
-    async def pix_callback(btn_interaction):
-        embed_pix = discord.Embed(
-            title="💳 Informações PIX",
-            description=config.get('pix_info', 'Configure o PIX com .setup'),
-            color=discord.Color.gold()
-        )
-        embed_pix.add_field(name="💰 Valor a Pagar", value=f"R$ {produto['preco']}", inline=False)
-        embed_pix.set_footer(text="Após realizar o pagamento, envie o comprovante neste canal")
-        await btn_interaction.response.send_message(embed=embed_pix, ephemeral=True)
-    
-    aprovar_btn.callback = aprovar_callback
-    fechar_btn.callback = fechar_callback
-    pix_btn.callback = pix_callback
-    
-    view = View(timeout=None)
-    view.add_item(pix_btn)
-    view.add_item(aprovar_btn)
-    view.add_item(fechar_btn)
-    
-    await canal.send(f"{user.mention}", embed=embed_carrinho, view=view)
-    
-    await interaction.response.send_message(f"✅ Carrinho criado! Acesse {canal.mention}", ephemeral=True)
+        carrinhos.remover(carrinho.canal_id)
+        await self.limitador.aguardar(carrinho.guild_id)
+        await canal.delete(reason="Carrinho expirado por inatividade")
+
+varredor_carrinhos = VarredorCarrinhos(
+    TTL_CARRINHO_HORAS * 3600,
+    AVISO_CARRINHO_MINUTOS * 60,
+    LimitadorTaxa(LIMITE_EXCLUSOES_QTD, LIMITE_EXCLUSOES_SEGUNDOS)
+)
 
 # Comando para configurar PIX
 @bot.command(name='ConfigPix')
@@ -1355,8 +3280,10 @@ async def config_pix(ctx):
     modal.add_item(pix_input)
     
     async def on_submit(interaction):
-        config['pix_info'] = pix_input.value
-        save_config(config)
+        inquilino = inquilinos.obter(interaction.guild_id)
+        
+        inquilino.config['pix_info'] = pix_input.value
+        save_config(inquilino.config, 'pix_info')
         
         embed = discord.Embed(
             title="✅ PIX Configurado",
@@ -1385,26 +3312,933 @@ async def config_pix(ctx):
     
     await ctx.send("💳 Clique no botão para configurar o PIX:", view=view)
 
+# Roteador único dos componentes enviados pelo bot
+async def rota_painel(interaction, prod_id, acao):
+    if acao == 'comprar':
+        await comprar_produto(interaction, prod_id)
+
+async def rota_drop(interaction, drop_id, acao):
+    if acao == 'comprar':
+        await comprar_opcao_drop(interaction, drop_id, int(interaction.data['values'][0]))
+
+async def rota_carrinho(interaction, *partes):
+    # Carrinhos criados antes do roteador usam "carrinho:<ação>"
+    acao = partes[-1]
+    acoes = {'pix': pix_carrinho, 'aprovar': aprovar_carrinho, 'fechar': fechar_carrinho}
+    if acao in acoes:
+        await acoes[acao](interaction)
+
+async def rota_setup(interaction, acao):
+    acoes = {
+        'categoria': categoria_callback,
+        'pix': pix_callback,
+        'criar_produto': criar_produto_callback,
+        'criar_drop': criar_drop_callback,
+        'editar_produto': editar_produto_callback,
+        'editar_drop': editar_drop_callback,
+        'enviar_painel': enviar_painel_callback,
+        'enviar_drop': enviar_drop_callback,
+        'listar_produtos': listar_produtos_callback,
+        'listar_drop': listar_drop_callback
+    }
+    if acao in acoes:
+        await acoes[acao](interaction)
+
+ROTAS = {
+    'painel': rota_painel,
+    'drop': rota_drop,
+    'carrinho': rota_carrinho,
+    'setup': rota_setup
+}
+
+@bot.event
+async def on_interaction(interaction):
+    if MODO_ENXUTO:
+        cache_equipe.observar(interaction.user)
+    
+    if interaction.type != discord.InteractionType.component:
+        return
+    
+    prefixo, _, resto = interaction.data.get('custom_id', '').partition(':')
+    rota = ROTAS.get(prefixo)
+    if rota and resto:
+        await rota(interaction, *resto.split(':'))
+
+# Comando para configurar o cargo mencionado quando um comprovante é enviado
+@bot.command(name='ConfigEquipe')
+@is_owner_or_admin()
+async def config_equipe(ctx, cargo: discord.Role = None):
+    inquilino = inquilinos.obter(ctx.guild.id)
+    
+    inquilino.config['cargo_equipe_id'] = cargo.id if cargo else None
+    save_config(inquilino.config, 'cargo_equipe_id')
+    
+    if cargo:
+        await ctx.send(f"✅ Comprovantes agora mencionam o cargo {cargo.mention}!")
+    else:
+        await ctx.send("✅ Cargo removido! Comprovantes voltam a mencionar os administradores.")
+
+# Cache dos administradores de cada servidor, para avisar sobre comprovantes sem
+# percorrer todos os membros. Montado uma vez por servidor e mantido pelos eventos abaixo.
+# No modo enxuto não há lista de membros: a equipe é aprendida conforme os administradores
+# interagem com o bot (mensagens e cliques), limitada a MAX_EQUIPE_OBSERVADA por servidor
+MAX_EQUIPE_OBSERVADA = 25
+
+def eh_equipe(membro):
+    return not membro.bot and membro.guild_permissions.administrator
+
+class CacheEquipe:
+    def __init__(self):
+        self.guilds = {}
+
+    def membros(self, guild):
+        equipe = self.guilds.get(guild.id)
+        if equipe is None:
+            equipe = {} if MODO_ENXUTO else {m.id: m for m in guild.members if eh_equipe(m)}
+            self.guilds[guild.id] = equipe
+        return list(equipe.values())
+
+    def observar(self, membro):
+        if not isinstance(membro, discord.Member) or not eh_equipe(membro):
+            return
+        
+        equipe = self.guilds.setdefault(membro.guild.id, {})
+        equipe.pop(membro.id, None)
+        equipe[membro.id] = membro
+        if len(equipe) > MAX_EQUIPE_OBSERVADA:
+            del equipe[next(iter(equipe))]
+
+    def atualizar_membro(self, membro):
+        equipe = self.guilds.get(membro.guild.id)
+        if equipe is None:
+            return
+        if eh_equipe(membro):
+            equipe[membro.id] = membro
+        else:
+            equipe.pop(membro.id, None)
+
+    def remover_membro(self, membro):
+        self.guilds.get(membro.guild.id, {}).pop(membro.id, None)
+
+    def revisar(self, membros):
+        for membro in membros:
+            self.atualizar_membro(membro)
+
+cache_equipe = CacheEquipe()
+
+def mencoes_equipe(guild):
+    inquilino = inquilinos.obter(guild.id)
+    
+    mencoes = f"<@{guild.owner_id}>"
+    
+    # Com um cargo de equipe configurado, menciona o cargo em vez de listar administradores
+    if inquilino.config.get('cargo_equipe_id'):
+        return f"{mencoes} <@&{inquilino.config['cargo_equipe_id']}>"
+    
+    admins = [m for m in cache_equipe.membros(guild) if m.id != guild.owner_id]
+    if admins:
+        mencoes += " " + " ".join([m.mention for m in admins[:3]])
+    return mencoes
+
+@bot.event
+async def on_member_update(before, after):
+    if before.roles != after.roles:
+        cache_equipe.atualizar_membro(after)
+
+@bot.event
+async def on_member_remove(member):
+    cache_equipe.remover_membro(member)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.permissions.administrator == after.permissions.administrator:
+        return
+    
+    if after.permissions.administrator:
+        cache_equipe.revisar(after.members)
+    else:
+        # Só quem já está no cache pode ter perdido o acesso
+        cache_equipe.revisar(cache_equipe.membros(after.guild))
+
+@bot.event
+async def on_guild_role_delete(role):
+    if role.permissions.administrator:
+        cache_equipe.revisar(cache_equipe.membros(role.guild))
+
 # Tratar menções no canal de carrinho
 @bot.event
 async def on_message(message):
     if message.author.bot:
         return
     
-    if message.channel.name.startswith('🚀') and message.attachments:
-        owner = message.guild.owner
-        admins = [m for m in message.guild.members if m.guild_permissions.administrator and not m.bot]
-        
-        mentions = f"{owner.mention}"
-        if admins and len(admins) > 0:
-            mentions += " " + " ".join([m.mention for m in admins[:3]])
-        
+    if MODO_ENXUTO:
+        cache_equipe.observar(message.author)
+    
+    carrinho = carrinhos.por_canal(message.channel.id)
+    if carrinho:
+        carrinhos.tocar(carrinho)
+    
+    if carrinho and message.attachments:
         await message.channel.send(
-            f"📸 {mentions}, comprovante enviado por {message.author.mention}!"
+            f"📸 {mencoes_equipe(message.guild)}, comprovante enviado por {message.author.mention}!"
         )
     
     await bot.process_commands(message)
 
+# Eventos de canais: mantêm o índice de carrinhos, a reserva e as vagas das categorias
+@bot.event
+async def on_guild_channel_delete(channel):
+    carrinhos.remover(channel.id)
+    pool_canais.remover(channel.id)
+    vagas_categorias.canal_apagado(channel)
+
+# Painel apagado: sai do registro. Só olha servidores já carregados; os demais são
+# limpos quando a edição do painel encontrar a mensagem inexistente
+@bot.event
+async def on_raw_message_delete(payload):
+    inquilino = inquilinos.cache.get(payload.guild_id)
+    if inquilino is not None:
+        atualizador_paineis.esquecer(inquilino, payload.message_id)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    vagas_categorias.canal_criado(channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    vagas_categorias.canal_movido(before, after)
+
+# Importação e exportação do catálogo em CSV ou JSONL.
+# CSV: uma linha por produto e uma por opção de painel dropdown (as linhas de um painel
+# são agrupadas pelo id ou, sem id, pelo título). JSONL: um objeto por produto/painel,
+# com as opções do painel em "opcoes". Os dois formatos usam os mesmos nomes de campo.
+# O anexo é baixado em blocos para um arquivo temporário e lido linha a linha; só o plano
+# de alterações fica em memória. Nada é gravado se houver qualquer erro, e o que for
+# aplicado vai ao banco numa única transação
+COLUNAS_CATALOGO = (
+    'tipo', 'id', 'titulo', 'descricao', 'preco', 'imagem_url', 'tipo_imagem',
+    'emoji', 'opcao', 'opcao_descricao', 'opcao_emoji'
+)
+LIMITE_IMPORTACAO_MB = int(os.getenv('LIMITE_IMPORTACAO_MB', '20'))
+MODOS_SIMULACAO = ('simular', 'teste', 'dry-run')
+
+def ler_registros(arquivo, formato, codificacao='utf-8-sig'):
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, newline='')
+    try:
+        if formato == 'csv':
+            leitor = csv.DictReader(texto)
+            for registro in leitor:
+                yield leitor.line_num, registro
+        else:
+            for numero, linha in enumerate(texto, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    registro = None
+                yield numero, registro if isinstance(registro, dict) else None
+    finally:
+        texto.detach()
+
+class PlanoImportacao:
+    def __init__(self, inquilino):
+        self.inquilino = inquilino
+        # chave no arquivo -> [id existente ou None, dados, linha]
+        self.produtos = {}
+        self.drops = {}
+        self.erros = []
+
+    def adicionar(self, linha, registro):
+        if registro is None:
+            self.erros.append((linha, "linha não é um objeto JSON válido"))
+            return
+        
+        def campo(nome):
+            valor = registro.get(nome)
+            return '' if valor is None else str(valor).strip()
+        
+        tipo = campo('tipo').lower() or 'produto'
+        try:
+            if tipo == 'produto':
+                self.adicionar_produto(linha, campo, registro)
+            elif tipo == 'drop':
+                self.adicionar_drop(linha, campo, registro)
+            else:
+                raise ValueError(f"tipo desconhecido: {tipo!r} (use produto ou drop)")
+        except ValueError as erro:
+            self.erros.append((linha, str(erro)))
+
+    @staticmethod
+    def texto(valor, nome, maximo, obrigatorio=True):
+        if obrigatorio and not valor:
+            raise ValueError(f"{nome} é obrigatório")
+        if len(valor) > maximo:
+            raise ValueError(f"{nome} passa de {maximo} caracteres")
+        return valor
+
+    @staticmethod
+    def imagem(campo):
+        url = campo('imagem_url')
+        if url and not url.startswith(('http://', 'https://')):
+            raise ValueError(f"imagem_url inválida: {url!r}")
+        tipo_imagem = campo('tipo_imagem').lower() or 'gif'
+        if tipo_imagem not in ('gif', 'banner'):
+            raise ValueError(f"tipo_imagem inválido: {tipo_imagem!r} (use gif ou banner)")
+        return url or None, tipo_imagem
+
+    def adicionar_produto(self, linha, campo, registro):
+        item_id = campo('id')
+        imagem_url, tipo_imagem = self.imagem(campo)
+        dados = {
+            'titulo': self.texto(campo('titulo'), 'titulo', 100),
+            'descricao': self.texto(campo('descricao'), 'descricao', 1000),
+            'preco': ler_preco(campo('preco')),
+            'imagem_url': imagem_url,
+            'tipo_imagem': tipo_imagem
+        }
+        
+        chave = item_id or f"linha:{linha}"
+        if chave in self.produtos:
+            raise ValueError(f"produto {item_id} repetido no arquivo")
+        self.produtos[chave] = [item_id if item_id in self.inquilino.produtos else None, dados, linha]
+
+    def adicionar_drop(self, linha, campo, registro):
+        item_id = campo('id')
+        titulo = self.texto(campo('titulo'), 'titulo', 100)
+        chave = item_id or f"titulo:{titulo}"
+        
+        if isinstance(registro.get('opcoes'), list):
+            opcoes = registro['opcoes']
+        elif campo('opcao'):
+            opcoes = [{
+                'nome': campo('opcao'), 'descricao': campo('opcao_descricao'),
+                'preco': campo('preco'), 'emoji': campo('opcao_emoji')
+            }]
+        else:
+            opcoes = []
+        
+        validadas = []
+        for opcao in opcoes:
+            if not isinstance(opcao, dict):
+                raise ValueError("opção precisa ser um objeto")
+            preco = ler_preco(opcao.get('preco') or '')
+            validadas.append({
+                'id': str(opcao['id']) if opcao.get('id') else None,
+                'nome': self.texto(str(opcao.get('nome') or '').strip(), 'nome da opção', 100),
+                'descricao': self.texto(str(opcao.get('descricao') or '').strip(), 'descrição da opção', 100, False)
+                    or f"Valor: {formatar_preco(preco)}",
+                'preco': preco,
+                'emoji': str(opcao.get('emoji') or '').strip() or '💎'
+            })
+        
+        # Linhas seguintes do mesmo painel (CSV) só acrescentam opções
+        if chave in self.drops:
+            self.drops[chave][1]['opcoes'].extend(validadas)
+            return
+        
+        imagem_url, tipo_imagem = self.imagem(campo)
+        dados = {
+            'titulo_painel': titulo,
+            'descricao_painel': self.texto(campo('descricao'), 'descricao', 1000),
+            'emoji_painel': campo('emoji') or '📦',
+            'imagem_url': imagem_url,
+            'tipo_imagem': tipo_imagem,
+            'opcoes': validadas
+        }
+        self.drops[chave] = [item_id if item_id in self.inquilino.produtos_drop else None, dados, linha]
+
+    def validar_drops(self):
+        for item_id, dados, linha in self.drops.values():
+            if not 1 <= len(dados['opcoes']) <= MAX_OPCOES_DROP:
+                self.erros.append((linha, f"painel {dados['titulo_painel']!r} precisa de 1 a {MAX_OPCOES_DROP} opções"))
+            anteriores = self.inquilino.produtos_drop[item_id]['opcoes'] if item_id else ()
+            garantir_ids_opcoes(dados['opcoes'], anteriores)
+
+    @staticmethod
+    def mudanca(campo, antes, depois):
+        if campo == 'opcoes':
+            return f"opcoes: {len(antes or [])} -> {len(depois)}"
+        if campo == 'preco':
+            return f"preco: {formatar_preco(antes) if isinstance(antes, int) else repr(antes)} -> {formatar_preco(depois)}"
+        return f"{campo}: {antes!r} -> {depois!r}"
+
+    def relatorio(self):
+        linhas = [f"linha {linha}: ERRO {erro}" for linha, erro in sorted(self.erros)]
+        contagem = {'novos': 0, 'alterados': 0, 'iguais': 0}
+        
+        for nome, planos, atuais, campo_titulo in (
+            ('produto', self.produtos, self.inquilino.produtos, 'titulo'),
+            ('drop', self.drops, self.inquilino.produtos_drop, 'titulo_painel')
+        ):
+            for item_id, dados, linha in planos.values():
+                if item_id is None:
+                    contagem['novos'] += 1
+                    linhas.append(f"linha {linha}: + {nome} novo {dados[campo_titulo]!r}")
+                    continue
+                
+                atual = atuais.get(item_id)
+                if atual is None:
+                    # Removido do catálogo depois da leitura do arquivo: volta como novo, com o mesmo id
+                    contagem['novos'] += 1
+                    linhas.append(f"linha {linha}: + {nome} {item_id} (removido, será recriado)")
+                    continue
+                mudancas = [c for c in dados if atual.get(c) != dados[c]]
+                if not mudancas:
+                    contagem['iguais'] += 1
+                    continue
+                contagem['alterados'] += 1
+                detalhes = ', '.join(self.mudanca(c, atual.get(c), dados[c]) for c in mudancas)
+                linhas.append(f"linha {linha}: ~ {nome} {item_id} ({detalhes})")
+        
+        return contagem, "\n".join(linhas)
+
+    async def aplicar(self):
+        # Os ids novos vêm antes: reservar um bloco espera o banco, e nesse meio tempo o servidor
+        # pode sair do cache. Depois as alterações vão para o inquilino atual, sem await no meio.
+        # Devolve False se a gravação no banco falhar
+        guild_id = self.inquilino.guild_id
+        novos_produtos = []
+        for item_id, _, _ in self.produtos.values():
+            if item_id is None:
+                novos_produtos.append(await novo_id_produto(inquilinos.obter(guild_id)))
+        novos_drops = []
+        for item_id, _, _ in self.drops.values():
+            if item_id is None:
+                novos_drops.append(await novo_id_drop(inquilinos.obter(guild_id)))
+        
+        inquilino = self.inquilino = inquilinos.obter(guild_id)
+        agora = datetime.now().isoformat()
+        
+        produto_ids = []
+        novos = iter(novos_produtos)
+        for item_id, dados, _ in self.produtos.values():
+            item_id = item_id or next(novos)
+            if item_id in inquilino.produtos:
+                inquilino.produtos[item_id].update(dados)
+                inquilino.produtos[item_id].pop('preco_original', None)
+            else:
+                inquilino.produtos[item_id] = dict(dados, criado_em=agora)
+            produto_ids.append(item_id)
+        
+        drop_ids = []
+        novos = iter(novos_drops)
+        for item_id, dados, _ in self.drops.values():
+            item_id = item_id or next(novos)
+            if item_id in inquilino.produtos_drop:
+                inquilino.produtos_drop[item_id].update(dados)
+            else:
+                inquilino.produtos_drop[item_id] = dict(dados, criado_em=agora)
+            drop_ids.append(item_id)
+        
+        if produto_ids:
+            save_produtos(inquilino.produtos, *produto_ids)
+        if drop_ids:
+            save_produtos_drop(inquilino.produtos_drop, *drop_ids)
+        return await persistencia.descarregar()
+
+# O Excel em português salva CSV em Windows-1252: se o arquivo não for UTF-8, é lido de novo assim
+CODIFICACOES_IMPORTACAO = ('utf-8-sig', 'cp1252')
+
+def planejar_importacao(inquilino, arquivo, formato):
+    for codificacao in CODIFICACOES_IMPORTACAO:
+        arquivo.seek(0)
+        plano = PlanoImportacao(inquilino)
+        try:
+            for linha, registro in ler_registros(arquivo, formato, codificacao):
+                plano.adicionar(linha, registro)
+        except UnicodeDecodeError:
+            if codificacao == CODIFICACOES_IMPORTACAO[-1]:
+                raise
+            continue
+        plano.validar_drops()
+        return plano
+
+async def baixar_anexo(anexo, destino):
+    async with aiohttp.ClientSession() as sessao:
+        async with sessao.get(anexo.url) as resposta:
+            resposta.raise_for_status()
+            async for bloco in resposta.content.iter_chunked(64 * 1024):
+                destino.write(bloco)
+    destino.seek(0)
+
+def formato_arquivo(nome):
+    extensao = nome.rsplit('.', 1)[-1].lower()
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extensao)
+
+@bot.command(name='ImportarCatalogo')
+@is_owner_or_admin()
+async def importar_catalogo(ctx, modo: str = None):
+    if modo is not None and modo.lower() not in MODOS_SIMULACAO:
+        await ctx.send(
+            f"❌ Modo desconhecido: `{modo}`! Use `.ImportarCatalogo` para importar ou "
+            "`.ImportarCatalogo simular` para só ver as mudanças."
+        )
+        return
+    simular = modo is not None
+    
+    if not ctx.message.attachments:
+        await ctx.send("❌ Anexe um arquivo .csv ou .jsonl ao comando! Use `.ImportarCatalogo simular` para só ver as mudanças.")
+        return
+    
+    anexo = ctx.message.attachments[0]
+    formato = formato_arquivo(anexo.filename)
+    if not formato:
+        await ctx.send("❌ Formato não suportado! Use um arquivo .csv ou .jsonl")
+        return
+    if anexo.size > LIMITE_IMPORTACAO_MB * 1024 * 1024:
+        await ctx.send(f"❌ Arquivo grande demais! O limite é {LIMITE_IMPORTACAO_MB} MB.")
+        return
+    
+    inquilino = inquilinos.obter(ctx.guild.id)
+    aviso = await ctx.send("⏳ Lendo o arquivo...")
+    
+    try:
+        with tempfile.TemporaryFile() as arquivo:
+            await baixar_anexo(anexo, arquivo)
+            plano = await asyncio.to_thread(planejar_importacao, inquilino, arquivo, formato)
+    except aiohttp.ClientError as erro:
+        detalhe = f"HTTP {erro.status}" if isinstance(erro, aiohttp.ClientResponseError) else erro
+        await aviso.edit(content=f"❌ Não foi possível baixar o anexo: {detalhe}")
+        return
+    except UnicodeDecodeError:
+        await aviso.edit(content="❌ Não foi possível ler o arquivo! Salve-o em UTF-8 (ou CSV do Excel, Windows-1252) e envie de novo.")
+        return
+    except csv.Error as erro:
+        await aviso.edit(content=f"❌ CSV inválido: {erro}")
+        return
+    
+    # O download e a leitura esperaram: o servidor pode ter saído do cache e sido recarregado
+    plano.inquilino = inquilinos.obter(ctx.guild.id)
+    contagem, relatorio = plano.relatorio()
+    resumo = (
+        f"**Novos:** {contagem['novos']}\n**Alterados:** {contagem['alterados']}\n"
+        f"**Sem mudança:** {contagem['iguais']}\n**Erros:** {len(plano.erros)}"
+    )
+    
+    if plano.erros:
+        embed = discord.Embed(title="❌ Importação cancelada", description=f"{resumo}\n\nCorrija os erros e envie de novo; nada foi gravado.", color=discord.Color.red())
+    elif simular:
+        embed = discord.Embed(title="🔎 Simulação da importação", description=f"{resumo}\n\nNada foi gravado.", color=discord.Color.blue())
+    elif await plano.aplicar():
+        embed = discord.Embed(title="✅ Catálogo importado", description=resumo, color=discord.Color.green())
+    else:
+        embed = discord.Embed(
+            title="⚠️ Catálogo importado, mas ainda não gravado",
+            description=f"{resumo}\n\nA gravação no banco falhou; o bot tenta de novo sozinho em alguns segundos. Confira os logs antes de reiniciar o bot.",
+            color=discord.Color.orange()
+        )
+    
+    arquivo_relatorio = discord.File(io.BytesIO(relatorio.encode('utf-8')), filename="relatorio_importacao.txt")
+    await aviso.edit(content=None, embed=embed, attachments=[arquivo_relatorio] if relatorio else [])
+
+def linhas_csv_catalogo(produtos, drops):
+    for item_id, prod in produtos:
+        yield {
+            'tipo': 'produto', 'id': item_id, 'titulo': prod['titulo'], 'descricao': prod['descricao'],
+            'preco': formatar_preco(prod['preco']), 'imagem_url': prod.get('imagem_url') or '', 'tipo_imagem': prod.get('tipo_imagem', 'gif')
+        }
+    for item_id, drop in drops:
+        for opcao in drop['opcoes']:
+            yield {
+                'tipo': 'drop', 'id': item_id, 'titulo': drop['titulo_painel'], 'descricao': drop['descricao_painel'],
+                'preco': formatar_preco(opcao['preco']), 'imagem_url': drop.get('imagem_url') or '', 'tipo_imagem': drop.get('tipo_imagem', 'gif'),
+                'emoji': drop['emoji_painel'], 'opcao': opcao['nome'], 'opcao_descricao': opcao.get('descricao', ''),
+                'opcao_emoji': opcao.get('emoji', '')
+            }
+
+def registros_jsonl_catalogo(produtos, drops):
+    for item_id, prod in produtos:
+        yield {
+            'tipo': 'produto', 'id': item_id, 'titulo': prod['titulo'], 'descricao': prod['descricao'],
+            'preco': formatar_preco(prod['preco']), 'imagem_url': prod.get('imagem_url'), 'tipo_imagem': prod.get('tipo_imagem', 'gif')
+        }
+    for item_id, drop in drops:
+        yield {
+            'tipo': 'drop', 'id': item_id, 'titulo': drop['titulo_painel'], 'descricao': drop['descricao_painel'],
+            'emoji': drop['emoji_painel'], 'imagem_url': drop.get('imagem_url'), 'tipo_imagem': drop.get('tipo_imagem', 'gif'),
+            'opcoes': [dict(opcao, preco=formatar_preco(opcao['preco'])) for opcao in drop['opcoes']]
+        }
+
+def escrever_catalogo(arquivo, produtos, drops, formato):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+    if formato == 'csv':
+        escritor = csv.DictWriter(texto, fieldnames=COLUNAS_CATALOGO)
+        escritor.writeheader()
+        escritor.writerows(linhas_csv_catalogo(produtos, drops))
+    else:
+        for registro in registros_jsonl_catalogo(produtos, drops):
+            texto.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    texto.flush()
+    texto.detach()
+    arquivo.seek(0)
+
+@bot.command(name='ExportarCatalogo')
+@is_owner_or_admin()
+async def exportar_catalogo(ctx, formato: str = 'csv'):
+    formato = formato.lower()
+    if formato not in ('csv', 'jsonl'):
+        await ctx.send("❌ Formato não suportado! Use `.ExportarCatalogo csv` ou `.ExportarCatalogo jsonl`")
+        return
+    
+    inquilino = inquilinos.obter(ctx.guild.id)
+    if not inquilino.produtos and not inquilino.produtos_drop:
+        await ctx.send("❌ Nenhum produto cadastrado ainda!")
+        return
+    
+    # Cópia rasa das listas: o arquivo é escrito fora do loop de eventos
+    produtos = list(inquilino.produtos.items())
+    drops = list(inquilino.produtos_drop.items())
+    
+    with tempfile.TemporaryFile() as arquivo:
+        await asyncio.to_thread(escrever_catalogo, arquivo, produtos, drops, formato)
+        try:
+            await ctx.send(
+                f"📦 Catálogo: {len(produtos)} produtos e {len(drops)} painéis dropdown",
+                file=discord.File(arquivo, filename=f"catalogo_{ctx.guild.id}.{formato}")
+            )
+        except discord.HTTPException as erro:
+            await ctx.send(f"❌ Não foi possível enviar o arquivo: {erro}")
+
+# Relatório de vendas a partir dos resumos do livro de vendas: o faturamento do mês soma
+# no máximo 31 resumos diários, qualquer que seja o histórico
+MAX_RELATORIO = 5
+
+# Nome atual do item no catálogo, para vendas registradas sem título
+def nome_produto_venda(inquilino, produto_id):
+    if produto_id in inquilino.produtos:
+        return inquilino.produtos[produto_id]['titulo']
+    
+    # Opção de painel dropdown: "<drop_id>:<id da opção>"
+    drop_id, _, opcao_id = produto_id.partition(':')
+    painel = inquilino.produtos_drop.get(drop_id)
+    if painel and opcao_id:
+        for opcao in painel['opcoes']:
+            if opcao.get('id') == opcao_id:
+                return f"{painel['titulo_painel']} - {opcao['nome']}"
+    
+    # Formato antigo, pela posição da opção ("<drop_id>_<índice>"): a opção nessa posição pode
+    # ser outra hoje, então só o painel é identificado
+    drop_id, _, indice = produto_id.rpartition('_')
+    painel = inquilino.produtos_drop.get(drop_id)
+    if painel and indice.isdigit():
+        return f"{painel['titulo_painel']} - opção {int(indice) + 1}"
+    return f"{produto_id} (removido)"
+
+@bot.command(name='relatorio')
+@is_owner_or_admin()
+async def relatorio(ctx, mes: str = None):
+    hoje = datetime.now()
+    try:
+        inicio = datetime.strptime(mes, '%Y-%m') if mes else hoje.replace(day=1)
+    except ValueError:
+        await ctx.send("❌ Mês inválido! Use `.relatorio` ou `.relatorio 2024-05`")
+        return
+    
+    mes = inicio.strftime('%Y-%m')
+    dias = armazenamento.vendas_por_dia(ctx.guild.id, f"{mes}-01", f"{mes}-31")
+    quantidade = sum(qtd for _, qtd, _ in dias)
+    total = sum(valor for _, _, valor in dias)
+    
+    embed = discord.Embed(
+        title=f"📊 Relatório de Vendas — {inicio.strftime('%m/%Y')}",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="💰 Faturamento", value=f"R$ {formatar_preco(total)}", inline=True)
+    embed.add_field(name="🛒 Vendas", value=str(quantidade), inline=True)
+    embed.add_field(
+        name="🎯 Ticket médio",
+        value=f"R$ {formatar_preco(total // quantidade)}" if quantidade else "—",
+        inline=True
+    )
+    
+    if dias:
+        dia, qtd, valor = max(dias, key=lambda resumo: resumo[2])
+        embed.add_field(
+            name="📅 Melhor dia",
+            value=f"{dia[8:]}/{dia[5:7]}: R$ {formatar_preco(valor)} em {qtd} venda(s)",
+            inline=False
+        )
+    if mes == hoje.strftime('%Y-%m'):
+        hoje_resumo = next((resumo for resumo in dias if resumo[0] == hoje.strftime('%Y-%m-%d')), None)
+        embed.add_field(
+            name="☀️ Hoje",
+            value=f"R$ {formatar_preco(hoje_resumo[2])} em {hoje_resumo[1]} venda(s)" if hoje_resumo else "Nenhuma venda",
+            inline=False
+        )
+    
+    inquilino = inquilinos.obter(ctx.guild.id)
+    produtos = armazenamento.maiores_vendas(ctx.guild.id, 'produto', MAX_RELATORIO)
+    compradores = armazenamento.maiores_vendas(ctx.guild.id, 'comprador', MAX_RELATORIO)
+    embed.add_field(
+        name="🏆 Produtos mais vendidos (sempre)",
+        value="\n".join(
+            f"**{i}.** {(titulo or nome_produto_venda(inquilino, chave))[:80]} — R$ {formatar_preco(valor)} ({qtd}x)"
+            for i, (chave, qtd, valor, titulo) in enumerate(produtos, 1)
+        ) or "Nenhuma venda registrada",
+        inline=False
+    )
+    embed.add_field(
+        name="👥 Maiores compradores (sempre)",
+        value="\n".join(
+            f"**{i}.** <@{chave}> — R$ {formatar_preco(valor)} ({qtd}x)"
+            for i, (chave, qtd, valor, _) in enumerate(compradores, 1)
+        ) or "Nenhuma venda registrada",
+        inline=False
+    )
+    embed.set_footer(text="Vendas contadas na aprovação do pagamento")
+    await ctx.send(embed=embed)
+
+# Exportação do livro de vendas de um período em CSV ou JSONL. As linhas passam por
+# geradores (banco -> registro -> arquivo temporário) numa thread, então a memória não cresce
+# com o período. Os totais e a decisão de comprimir vêm dos resumos diários, antes de ler o livro
+COLUNAS_VENDAS = (
+    'id', 'aprovado_em', 'criado_em', 'carrinho_id', 'produto_id', 'produto',
+    'comprador_id', 'preco_centavos', 'preco'
+)
+LINHAS_SEM_COMPRESSAO = int(os.getenv('LINHAS_SEM_COMPRESSAO', '20000'))
+
+def ler_periodo(texto, final=False):
+    # "AAAA-MM-DD" é o próprio dia; "AAAA-MM" é o primeiro (ou, no fim do período, o último) dia do mês
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        inicio = datetime.strptime(texto, '%Y-%m')
+    if not final:
+        return inicio
+    return (inicio + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+def registros_vendas(linhas, inquilino):
+    nomes = {}
+    for venda_id, aprovado_em, criado_em, carrinho_id, produto_id, comprador_id, preco, titulo in linhas:
+        if not titulo and produto_id not in nomes:
+            nomes[produto_id] = nome_produto_venda(inquilino, produto_id)
+        yield {
+            'id': venda_id, 'aprovado_em': aprovado_em, 'criado_em': criado_em, 'carrinho_id': carrinho_id,
+            'produto_id': produto_id, 'produto': titulo or nomes[produto_id], 'comprador_id': comprador_id,
+            'preco_centavos': preco, 'preco': formatar_preco(preco)
+        }
+
+def escrever_vendas(arquivo, registros, formato, comprimir):
+    destino = gzip.GzipFile(fileobj=arquivo, mode='wb') if comprimir else arquivo
+    texto = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+    if formato == 'csv':
+        escritor = csv.DictWriter(texto, fieldnames=COLUNAS_VENDAS)
+        escritor.writeheader()
+        escritor.writerows(registros)
+    else:
+        for registro in registros:
+            texto.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    texto.flush()
+    texto.detach()
+    if comprimir:
+        # Fecha só o gzip (grava o rodapé); o arquivo temporário continua aberto
+        destino.close()
+    tamanho = arquivo.tell()
+    arquivo.seek(0)
+    return tamanho
+
+@bot.command(name='exportar')
+@is_owner_or_admin()
+async def exportar(ctx, *argumentos):
+    formatos = [arg.lower() for arg in argumentos if arg.lower() in ('csv', 'jsonl')]
+    datas = [arg for arg in argumentos if arg.lower() not in ('csv', 'jsonl')]
+    formato = formatos[0] if formatos else 'csv'
+    
+    try:
+        if len(datas) > 2:
+            raise ValueError
+        inicio = ler_periodo(datas[0]) if datas else datetime.now().replace(day=1)
+        fim = ler_periodo(datas[-1], final=True) if datas else datetime.now()
+    except ValueError:
+        await ctx.send(
+            "❌ Período inválido! Exemplos: `.exportar`, `.exportar 2024-05`, "
+            "`.exportar 2024-01 2024-03 jsonl`, `.exportar 2024-05-01 2024-05-15 csv`"
+        )
+        return
+    if fim < inicio:
+        await ctx.send("❌ A data final é anterior à inicial!")
+        return
+    
+    inicio_dia = inicio.strftime('%Y-%m-%d')
+    fim_dia = fim.strftime('%Y-%m-%d')
+    dias = armazenamento.vendas_por_dia(ctx.guild.id, inicio_dia, fim_dia)
+    quantidade = sum(qtd for _, qtd, _ in dias)
+    total = sum(valor for _, _, valor in dias)
+    if not quantidade:
+        await ctx.send(f"❌ Nenhuma venda entre {inicio.strftime('%d/%m/%Y')} e {fim.strftime('%d/%m/%Y')}!")
+        return
+    
+    comprimir = quantidade > LINHAS_SEM_COMPRESSAO
+    registros = registros_vendas(
+        armazenamento.ler_vendas(ctx.guild.id, inicio_dia, (fim + timedelta(days=1)).strftime('%Y-%m-%d')),
+        inquilinos.obter(ctx.guild.id)
+    )
+    nome = f"vendas_{ctx.guild.id}_{inicio_dia}_{fim_dia}.{formato}{'.gz' if comprimir else ''}"
+    
+    with tempfile.TemporaryFile() as arquivo:
+        tamanho = await asyncio.to_thread(escrever_vendas, arquivo, registros, formato, comprimir)
+        if tamanho > ctx.guild.filesize_limit:
+            await ctx.send(
+                f"❌ O arquivo ficou com {tamanho / (1024 * 1024):.1f} MB, acima do limite do servidor. "
+                f"Exporte um período menor."
+            )
+            return
+        try:
+            await ctx.send(
+                f"📊 {quantidade} vendas | R$ {formatar_preco(total)} | "
+                f"{inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}",
+                file=discord.File(arquivo, filename=nome)
+            )
+        except discord.HTTPException as erro:
+            await ctx.send(f"❌ Não foi possível enviar o arquivo: {erro}")
+
+# Shards
+@bot.event
+async def on_shard_disconnect(shard_id):
+    print(f'⚠️ Shard {shard_id} desconectado')
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    print(f'🔁 Shard {shard_id} reconectado')
+
+# Latência e eventos por segundo de cada shard deste processo
+@bot.command(name='status')
+@is_owner_or_admin()
+async def status(ctx):
+    servidores = {}
+    for guild in bot.guilds:
+        servidores[guild.shard_id] = servidores.get(guild.shard_id, 0) + 1
+    
+    linhas = []
+    for shard_id, shard in sorted(bot.shards.items()):
+        latencia = shard.latency
+        latencia = f"{latencia * 1000:.0f} ms" if latencia != float('inf') else "—"
+        linhas.append(
+            f"`#{shard_id}` {'🔴' if shard.is_closed() else '🟢'} {latencia} | "
+            f"{metricas_shards.taxa(shard_id):.1f} eventos/s | "
+            f"{metricas_shards.totais.get(shard_id, 0)} eventos | {servidores.get(shard_id, 0)} servidores"
+        )
+    
+    embed = discord.Embed(
+        title="📡 Status dos Shards",
+        description="\n".join(linhas)[:4096] or "Nenhum shard conectado",
+        color=discord.Color.blue()
+    )
+    embed.add_field(
+        name="Processo",
+        value=(
+            f"Shards: {', '.join(map(str, SHARD_IDS)) if SHARD_IDS else 'todos'} de {bot.shard_count}\n"
+            f"Carrinhos abertos: {len(carrinhos.por_id)}\n"
+            f"Servidores em memória: {len(inquilinos.cache)}"
+        ),
+        inline=False
+    )
+    consultas = cache_embeds.acertos + cache_embeds.falhas
+    embed.add_field(
+        name="Cache de embeds",
+        value=(
+            f"{cache_embeds.acertos} acertos | {cache_embeds.falhas} falhas"
+            f"{f' ({cache_embeds.acertos / consultas:.0%})' if consultas else ''}\n"
+            f"{len(cache_embeds.cache)}/{cache_embeds.maximo} embeds"
+        ),
+        inline=False
+    )
+    embed.set_footer(text=f"Este servidor está no shard {ctx.guild.shard_id}")
+    await ctx.send(embed=embed)
+
+# /produto: busca no catálogo com autocompletar (produtos e painéis dropdown)
+MAX_SUGESTOES = 25
+
+def buscar_catalogo(inquilino, termo, limite=MAX_SUGESTOES):
+    resultados = []
+    for prefixo, dados, textos in (('p', inquilino.produtos, textos_produto), ('d', inquilino.produtos_drop, textos_drop)):
+        # Catálogo com o índice ainda em montagem fica de fora desta busca
+        busca = indice_busca(dados, textos)
+        if busca is not None:
+            resultados += [(ordem, f"{prefixo}:{chave}") for ordem, chave in busca.buscar(termo, limite)]
+    return [valor for _, valor in sorted(resultados)[:limite]]
+
+def item_catalogo(inquilino, valor):
+    tipo, _, chave = valor.partition(':')
+    dados = {'p': inquilino.produtos, 'd': inquilino.produtos_drop}.get(tipo)
+    if dados is None or chave not in dados:
+        return None, None, None
+    return tipo, chave, dados[chave]
+
+def nome_sugestao(tipo, item):
+    if tipo == 'p':
+        return f"🛒 {item['titulo']} — R$ {formatar_preco(item['preco'])}"[:100]
+    return f"{item['emoji_painel']} {item['titulo_painel']} — {len(item['opcoes'])} opções"[:100]
+
+@bot.tree.command(name='produto', description='Busca um produto ou painel dropdown do catálogo')
+@app_commands.describe(busca='Título, descrição ou opção do produto')
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+async def produto_slash(interaction: discord.Interaction, busca: str):
+    if not eh_dono_ou_admin(interaction):
+        await interaction.response.send_message(
+            "❌ Você precisa ser Administrador ou Dono do Servidor!",
+            ephemeral=True
+        )
+        return
+    
+    inquilino = inquilinos.obter(interaction.guild_id)
+    
+    # Texto digitado sem escolher uma sugestão: usa o melhor resultado
+    tipo, chave, item = item_catalogo(inquilino, busca)
+    if item is None:
+        encontrados = buscar_catalogo(inquilino, busca, 1)
+        if encontrados:
+            tipo, chave, item = item_catalogo(inquilino, encontrados[0])
+    
+    if item is None:
+        await interaction.response.send_message("❌ Nenhum produto encontrado!", ephemeral=True)
+        return
+    
+    editar = Button(label="Editar", emoji="✏️", style=discord.ButtonStyle.primary)
+    enviar = Button(label="Enviar painel aqui", emoji="📤", style=discord.ButtonStyle.success)
+    
+    async def editar_callback(btn_interaction):
+        inquilino = inquilinos.obter(btn_interaction.guild_id)
+        atual = (inquilino.produtos if tipo == 'p' else inquilino.produtos_drop).get(chave)
+        if atual is None:
+            await btn_interaction.response.send_message("❌ Item não encontrado! Ele pode ter sido removido.", ephemeral=True)
+            return
+        modal = EditarProdutoModal(chave, atual) if tipo == 'p' else EditarProdutoDropModal1(chave, atual)
+        await btn_interaction.response.send_modal(modal)
+    
+    async def enviar_callback(btn_interaction):
+        inquilino = inquilinos.obter(btn_interaction.guild_id)
+        atual = (inquilino.produtos if tipo == 'p' else inquilino.produtos_drop).get(chave)
+        if atual is None:
+            await btn_interaction.response.send_message("❌ Item não encontrado! Ele pode ter sido removido.", ephemeral=True)
+            return
+        await enviar_painel(inquilino, btn_interaction.channel, tipo, chave)
+        await btn_interaction.response.send_message("✅ Painel enviado!", ephemeral=True)
+    
+    editar.callback = editar_callback
+    enviar.callback = enviar_callback
+    view = View()
+    view.add_item(editar)
+    view.add_item(enviar)
+    
+    embed = embed_painel_produto(inquilino.produtos, chave) if tipo == 'p' else embed_painel_drop(inquilino.produtos_drop, chave)
+    embed.set_footer(text=f"ID: {chave}")
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+@produto_slash.autocomplete('busca')
+async def produto_autocompletar(interaction: discord.Interaction, atual: str):
+    if not eh_dono_ou_admin(interaction):
+        return []
+    
+    inquilino = inquilinos.obter(interaction.guild_id)
+    sugestoes = []
+    for valor in buscar_catalogo(inquilino, atual):
+        tipo, _, item = item_catalogo(inquilino, valor)
+        sugestoes.append(app_commands.Choice(name=nome_sugestao(tipo, item), value=valor))
+    return sugestoes
+
 import os
 
 TOKEN = os.getenv("DISCORD_TOKEN")